@@ -0,0 +1,136 @@
+"""
+Minimal environment for the benchmarks and behaviour tests.
+
+Configures Django with an in-memory cache and stubs the parts of NetBox the
+plugin imports at module level, so the suite runs without NetBox,
+PostgreSQL or Redis.
+"""
+
+import itertools
+import sys
+import types
+
+import django
+import pytest
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        PLUGINS_CONFIG={"netbox_custom_widget": {}},
+        USE_I18N=False,
+    )
+    django.setup()
+
+try:
+    import netbox.plugins  # noqa: F401
+except ImportError:
+    netbox = types.ModuleType("netbox")
+    netbox_plugins = types.ModuleType("netbox.plugins")
+    netbox_plugins.PluginConfig = type("PluginConfig", (), {"ready": lambda self: None})
+    netbox.plugins = netbox_plugins
+    sys.modules["netbox"] = netbox
+    sys.modules["netbox.plugins"] = netbox_plugins
+
+    # The models need NetBox and a database: modules importing them get a stand-in (see endpoint_store)
+    plugin_models = types.ModuleType("netbox_custom_widget.models")
+    plugin_models.CustomAPIEndpoint = type("CustomAPIEndpoint", (), {"objects": None})
+    sys.modules["netbox_custom_widget.models"] = plugin_models
+
+
+@pytest.fixture
+def settings_override():
+    """Temporarily override plugin settings."""
+    from django.conf import settings
+
+    config = settings.PLUGINS_CONFIG["netbox_custom_widget"]
+    original = dict(config)
+
+    def override(**values):
+        config.update(values)
+
+    yield override
+    config.clear()
+    config.update(original)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache."""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+_endpoint_pks = itertools.count(1)
+
+
+@pytest.fixture
+def make_endpoint():
+    """
+    Factory for stand-ins of CustomAPIEndpoint, with the model's field defaults unless overridden.
+
+    Every endpoint gets its own pk, so compiled mapping plans and per-endpoint
+    circuit breakers are never shared between tests.
+    """
+
+    def make(**attrs):
+        pk = attrs.pop("pk", None) or next(_endpoint_pks)
+        values = {
+            "pk": pk,
+            "name": f"endpoint-{pk}",
+            "url": "https://api.example.com/items/",
+            "http_method": "GET",
+            "headers": {},
+            "body": "",
+            "verify_ssl": True,
+            "timeout": 30,
+            "refresh_interval": 30,
+            "stale_while_revalidate": 0,
+            "display_mode": "list",
+            "mappings": [],
+            "where": [],
+            "sort_by": "",
+            "sort_order": "asc",
+            "limit": 0,
+            "pagination": "none",
+            "results_field": "results",
+            "page_size": 100,
+            "max_pages": 10,
+            "last_updated": None,
+        }
+        values.update(attrs)
+        return types.SimpleNamespace(**values)
+
+    return make
+
+
+class EndpointManager:
+    """In-memory stand-in for CustomAPIEndpoint.objects counting the queries made."""
+
+    def __init__(self, endpoints):
+        self.endpoints = {endpoint.pk: endpoint for endpoint in endpoints}
+        self.queries = 0
+
+    def in_bulk(self, pks):
+        self.queries += 1
+        return {pk: self.endpoints[pk] for pk in pks if pk in self.endpoints}
+
+    def filter(self, refresh_interval__gt):
+        self.queries += 1
+        return [endpoint for endpoint in self.endpoints.values() if endpoint.refresh_interval > refresh_interval__gt]
+
+
+@pytest.fixture
+def endpoint_store(monkeypatch):
+    """Serve CustomAPIEndpoint queries from the endpoints passed to the returned function."""
+    from netbox_custom_widget.models import CustomAPIEndpoint
+
+    def store(*endpoints):
+        manager = EndpointManager(endpoints)
+        monkeypatch.setattr(CustomAPIEndpoint, "objects", manager)
+        return manager
+
+    return store
@@ -0,0 +1,73 @@
+"""Behaviour checks for the serialization and compression of cache entries."""
+
+import pytest
+from django.core.cache import cache
+
+from netbox_custom_widget import cache_codec
+
+SMALL = {"data": {"status": "up"}, "error": None}
+LARGE = {"data": [{"name": f"host-{i}", "status": "up"} for i in range(2000)], "error": None}
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd", "none"])
+@pytest.mark.parametrize("value", [SMALL, LARGE], ids=["small", "large"])
+def test_round_trip(settings_override, codec, value):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    settings_override(cache_codec=codec)
+    encoded = cache_codec.encode_cache_value(value)
+    assert cache_codec.decode_cache_value(encoded) == value
+
+    marker = {"zlib": b"Z", "zstd": b"S", "none": b"P"}[codec] if value is LARGE else b"P"
+    assert encoded[:1] == marker
+
+
+def test_values_below_threshold_not_compressed(settings_override):
+    settings_override(cache_compress_threshold=10**9)
+    assert cache_codec.encode_cache_value(LARGE)[:1] == b"P"
+
+
+def test_values_written_without_codec_returned_as_is():
+    assert cache_codec.decode_cache_value({"data": 1}) == {"data": 1}
+    assert cache_codec.decode_cache_value(None) is None
+    assert cache_codec.decode_cache_value(b"") == b""
+
+
+def test_undecodable_entries_are_misses():
+    assert cache_codec.decode_cache_value(b"Z" + b"not zlib") is None
+    assert cache_codec.decode_cache_value(b"P" + b"not a pickle") is None
+
+    cache.set("custom_widget:test", b"Zgarbage")
+    assert cache_codec.cache_get("custom_widget:test") is None
+
+
+def test_zstd_entries_are_misses_without_zstandard(settings_override, monkeypatch):
+    pytest.importorskip("zstandard")
+    settings_override(cache_codec="zstd")
+    encoded = cache_codec.encode_cache_value(LARGE)
+    monkeypatch.setattr(cache_codec, "zstandard", None)
+    assert cache_codec.decode_cache_value(encoded) is None
+
+
+def test_zstd_setting_falls_back_to_zlib_without_zstandard(settings_override, monkeypatch):
+    settings_override(cache_codec="zstd")
+    monkeypatch.setattr(cache_codec, "zstandard", None)
+    encoded = cache_codec.encode_cache_value(LARGE)
+    assert encoded[:1] == b"Z"
+    assert cache_codec.decode_cache_value(encoded) == LARGE
+
+
+def test_cache_set_and_get():
+    cache_codec.cache_set("custom_widget:test", LARGE, 60)
+    assert isinstance(cache.get("custom_widget:test"), bytes)
+    assert cache_codec.cache_get("custom_widget:test") == LARGE
+    assert cache_codec.cache_get("custom_widget:missing") is None
+
+
+def test_codec_stats_count_saved_bytes():
+    before = cache_codec.get_cache_codec_stats()
+    cache_codec.encode_cache_value(LARGE)
+    after = cache_codec.get_cache_codec_stats()
+    assert after["entries"] == before["entries"] + 1
+    assert after["compressed"] == before["compressed"] + 1
+    assert after["bytes_saved"] > before["bytes_saved"]
@@ -0,0 +1,94 @@
+"""Behaviour checks for the per-endpoint and per-host circuit breakers."""
+
+import pytest
+
+from netbox_custom_widget import circuit, fetch
+
+
+@pytest.fixture
+def breaker(settings_override, monkeypatch):
+    settings_override(circuit_failure_threshold=2, circuit_backoff=10, circuit_backoff_max=25)
+    clock = [1000.0]
+    monkeypatch.setattr(circuit.time, "time", lambda: clock[0])
+    return clock
+
+
+def fail(ep):
+    retry_after, circuits = circuit.check_circuits(ep)
+    assert retry_after is None
+    circuit.record_circuit_result(circuits, failed=True)
+
+
+def test_circuit_opens_after_threshold(breaker, make_endpoint):
+    ep = make_endpoint()
+    fail(ep)
+    assert circuit.check_circuits(ep)[0] is None
+    fail(ep)
+    retry_after, circuits = circuit.check_circuits(ep)
+    assert retry_after == pytest.approx(10)
+    assert circuits == {}
+
+
+def test_circuit_half_open_probe(breaker, make_endpoint):
+    ep = make_endpoint()
+    fail(ep)
+    fail(ep)
+    breaker[0] += 11
+
+    retry_after, circuits = circuit.check_circuits(ep)
+    assert retry_after is None
+    assert all(circuit["probing"] for circuit in circuits.values())
+    # Only one caller gets the probe
+    assert circuit.check_circuits(ep)[0] == 1
+
+    # A failed probe reopens the circuit for twice as long
+    circuit.record_circuit_result(circuits, failed=True)
+    assert circuit.check_circuits(ep)[0] == pytest.approx(20)
+
+    # Backoff is capped at circuit_backoff_max
+    breaker[0] += 21
+    fail(ep)
+    assert circuit.check_circuits(ep)[0] == pytest.approx(25)
+
+
+def test_circuit_closes_on_success(breaker, make_endpoint):
+    ep = make_endpoint()
+    fail(ep)
+    fail(ep)
+    breaker[0] += 11
+
+    retry_after, circuits = circuit.check_circuits(ep)
+    circuit.record_circuit_result(circuits, failed=False)
+    retry_after, circuits = circuit.check_circuits(ep)
+    assert retry_after is None
+    assert all(circuit == {"failures": 0, "probing": False} for circuit in circuits.values())
+
+
+def test_host_circuit_shared_across_endpoints(breaker, make_endpoint):
+    fail(make_endpoint())
+    fail(make_endpoint())
+    assert circuit.check_circuits(make_endpoint())[0] == pytest.approx(10)
+    assert circuit.check_circuits(make_endpoint(url="https://other.example.com/"))[0] is None
+
+
+def test_circuit_breaker_disabled(breaker, settings_override, make_endpoint):
+    settings_override(circuit_failure_threshold=0)
+    ep = make_endpoint()
+    for _ in range(5):
+        fail(ep)
+    assert circuit.check_circuits(ep) == (None, {})
+
+
+def test_uncached_fetches_go_through_the_breaker(breaker, make_endpoint, monkeypatch):
+    calls = []
+
+    def failing_upstream(endpoint):
+        calls.append(endpoint)
+        return {"data": None, "error": "Connection failed", "circuit_failure": True}
+
+    monkeypatch.setattr(fetch, "_request_upstream", failing_upstream)
+    ep = make_endpoint(refresh_interval=0)
+    assert fetch.fetch_api_data(ep) == {"data": None, "error": "Connection failed"}
+    fetch.fetch_api_data(ep)
+    assert fetch.fetch_api_data(ep) == {"data": None, "error": "Upstream unavailable, retrying in 10s"}
+    assert len(calls) == 2
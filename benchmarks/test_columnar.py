@@ -0,0 +1,57 @@
+"""Behaviour checks for the columnar table processing mode and compiled threshold rules."""
+
+import pytest
+
+from netbox_custom_widget import utils
+
+THRESHOLDS = [
+    {"lt": 5, "color": "green"},
+    {"lt": 15, "color": "orange"},
+    {"gt": 100, "color": "purple"},
+    {"color": "red"},
+]
+
+MAPPINGS = [
+    {"field": "name", "label": "Name", "width": "20%"},
+    {"field": "state.status", "label": "Status", "color": "adaptive"},
+    {"field": "state.queue", "label": "Queued", "color": "threshold", "thresholds": THRESHOLDS, "format": "number"},
+    {"field": "uptime", "label": "Uptime", "format": "duration", "suffix": " up"},
+    {"field": "missing", "label": "Missing", "color": "success"},
+]
+ITEMS = [
+    {"name": "a", "state": {"status": "Running", "queue": 1234}, "uptime": "7.18:25:31"},
+    {"name": "b", "state": {"status": "Down", "queue": "3"}, "uptime": 640531},
+    {"name": "c", "state": None, "uptime": None},
+    {"name": "d", "state": {"status": None, "queue": 12.5}, "uptime": "P1DT2H"},
+]
+
+
+def test_columnar_matches_row_processing():
+    rows = utils.process_array_mappings(ITEMS, MAPPINGS)
+    columns = utils.process_array_columns(ITEMS, MAPPINGS)
+    assert columns["columns"] == rows["columns"]
+    assert columns["rows"] == rows["rows"]
+    assert len(columns) == len(ITEMS)
+    assert columns.take([3, 1]) == [rows["rows"][3], rows["rows"][1]]
+
+
+def test_columnar_empty_array():
+    columns = utils.process_array_columns([], MAPPINGS)
+    assert len(columns) == 0 and columns["rows"] == []
+
+
+@pytest.mark.parametrize(
+    "thresholds",
+    [
+        THRESHOLDS,
+        [{"gt": 10, "color": "red"}, {"lt": 10, "color": "green"}],
+        [{"lt": 0}, {"color": "blue"}],
+        [],
+    ],
+)
+def test_threshold_rules_match_sequential_evaluation(thresholds):
+    rules = utils.ThresholdRules(thresholds)
+    values = [-1, 0, 4.999, 5, 5.001, 10, 14, 15, 100, 100.5, "12", "n/a", None, float("nan"), float("inf")]
+    expected = [utils.get_threshold_color(v, thresholds) for v in values]
+    assert [rules(v) for v in values] == expected
+    assert rules.column(values) == expected
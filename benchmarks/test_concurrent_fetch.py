@@ -0,0 +1,58 @@
+"""Behaviour checks for the asyncio engine fetching endpoints concurrently."""
+
+import threading
+import time
+
+from netbox_custom_widget.concurrent_fetch import ConcurrentFetcher
+
+
+class SlowFetch:
+    """Blocking fetch_func sleeping for a while and recording the peak concurrency per host."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.running = {}
+        self.peak = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint):
+        with self.lock:
+            self.running[endpoint.url] = self.running.get(endpoint.url, 0) + 1
+            self.peak[endpoint.url] = max(self.peak.get(endpoint.url, 0), self.running[endpoint.url])
+        time.sleep(self.delay)
+        with self.lock:
+            self.running[endpoint.url] -= 1
+        return {"data": endpoint.pk, "error": None}
+
+
+def test_results_keyed_by_pk(make_endpoint):
+    endpoints = [make_endpoint() for _ in range(3)]
+    results = ConcurrentFetcher(SlowFetch(0)).fetch(endpoints)
+    assert results == {ep.pk: {"data": ep.pk, "error": None} for ep in endpoints}
+
+
+def test_per_host_limit(make_endpoint):
+    fetch_func = SlowFetch(0.05)
+    endpoints = [make_endpoint(url="https://a.example.com/") for _ in range(6)]
+    endpoints += [make_endpoint(url="https://b.example.com/") for _ in range(2)]
+    ConcurrentFetcher(fetch_func, per_host_limit=2).fetch(endpoints)
+    assert fetch_func.peak == {"https://a.example.com/": 2, "https://b.example.com/": 2}
+
+
+def test_batch_deadline(make_endpoint):
+    started = time.monotonic()
+    results = ConcurrentFetcher(SlowFetch(1)).fetch([make_endpoint(timeout=5)], deadline=0.3)
+    assert time.monotonic() - started < 0.9
+    assert list(results.values()) == [{"data": None, "error": "Request timed out (batch deadline of 0.3s)"}]
+
+
+def test_endpoint_timeout(make_endpoint):
+    results = ConcurrentFetcher(SlowFetch(2)).fetch([make_endpoint(timeout=0.1)], deadline=10)
+    assert list(results.values()) == [{"data": None, "error": "Request timed out (0.1s)"}]
+
+
+def test_fetch_errors_returned_as_results(make_endpoint):
+    def fail(endpoint):
+        raise RuntimeError("boom")
+
+    assert list(ConcurrentFetcher(fail).fetch([make_endpoint()]).values()) == [{"data": None, "error": "boom"}]
@@ -0,0 +1,72 @@
+"""Behaviour checks for the process-local endpoint configuration cache and its shared version token."""
+
+import pytest
+from django.core.cache import cache
+
+from netbox_custom_widget import endpoint_cache
+
+
+@pytest.fixture(autouse=True)
+def local_cache(monkeypatch):
+    """Start from an empty local cache that checks the shared version on every lookup."""
+    monkeypatch.setattr(endpoint_cache, "_entries", {})
+    monkeypatch.setattr(endpoint_cache, "_version", None)
+    monkeypatch.setattr(endpoint_cache, "_version_checked", float("-inf"))
+    monkeypatch.setattr(endpoint_cache, "VERSION_CHECK_INTERVAL", 0)
+
+
+def test_version_token_seeded_once():
+    version = endpoint_cache.get_config_version()
+    assert version
+    assert endpoint_cache.get_config_version() == version
+
+
+def test_version_token_never_repeats():
+    seen = {endpoint_cache.get_config_version()}
+    endpoint_cache._bump_version()
+    seen.add(endpoint_cache.get_config_version())
+
+    # An evicted token is replaced by a new one, not by a value an old worker may still hold
+    cache.delete(endpoint_cache.VERSION_CACHE_KEY)
+    seen.add(endpoint_cache.get_config_version())
+    assert len(seen) == 3
+
+
+def test_endpoints_loaded_once(endpoint_store, make_endpoint):
+    first, second = make_endpoint(), make_endpoint()
+    store = endpoint_store(first, second)
+
+    assert endpoint_cache.get_endpoints([first.pk, second.pk]) == {first.pk: first, second.pk: second}
+    assert endpoint_cache.get_endpoint(first.pk) is first
+    assert store.queries == 1
+
+    # Only the pks not cached yet are loaded, and unknown ones are left out
+    assert endpoint_cache.get_endpoints([first.pk, 999999]) == {first.pk: first}
+    assert store.queries == 2
+
+
+def test_local_edit_reloads(endpoint_store, make_endpoint):
+    endpoint = make_endpoint()
+    store = endpoint_store(endpoint)
+    endpoint_cache.get_endpoint(endpoint.pk)
+    endpoint_cache._bump_version()
+    endpoint_cache.get_endpoint(endpoint.pk)
+    assert store.queries == 2
+
+
+def test_edit_on_another_worker_reloads(endpoint_store, make_endpoint):
+    endpoint = make_endpoint()
+    store = endpoint_store(endpoint)
+    endpoint_cache.get_endpoint(endpoint.pk)
+    cache.set(endpoint_cache.VERSION_CACHE_KEY, "bumped-elsewhere", None)
+    endpoint_cache.get_endpoint(endpoint.pk)
+    assert store.queries == 2
+
+
+def test_cache_disabled(endpoint_store, make_endpoint, settings_override):
+    settings_override(endpoint_cache_ttl=0)
+    endpoint = make_endpoint()
+    store = endpoint_store(endpoint)
+    endpoint_cache.get_endpoint(endpoint.pk)
+    endpoint_cache.get_endpoint(endpoint.pk)
+    assert store.queries == 2
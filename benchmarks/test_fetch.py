@@ -0,0 +1,277 @@
+"""Behaviour checks for cached, single-flight fetching against a fake upstream."""
+
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from netbox_custom_widget import fetch
+from netbox_custom_widget.cache_codec import cache_get, cache_set
+
+
+class FakeUpstream:
+    """Stand-in for fetch._request_upstream recording its calls."""
+
+    def __init__(self):
+        self.calls = []
+        self.responses = []
+        self.gate = None
+
+    def __call__(self, endpoint, validators=None, paths=fetch._MISSING):
+        self.calls.append({"endpoint": endpoint, "validators": validators, "paths": paths})
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.responses:
+            return dict(self.responses.pop(0))
+        return {"data": {"call": len(self.calls)}, "error": None, "digest": str(len(self.calls))}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(fetch, "_request_upstream", fake)
+    yield fake
+    if fake.gate is not None:
+        fake.gate.set()
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def age_entry(key, seconds):
+    """Make the cached result under key look fetched the given number of seconds earlier."""
+    entry = cache_get(key)
+    entry["fetched_at"] -= seconds
+    entry["fresh_until"] -= seconds
+    cache_set(key, entry, 300)
+
+
+# Stale-while-revalidate
+
+
+def test_fresh_entry_served_from_cache(upstream, make_endpoint):
+    ep = make_endpoint()
+    first = fetch.fetch_api_data(ep)
+    assert first["data"] == {"call": 1}
+    assert fetch.fetch_api_data(ep) == first
+    assert len(upstream.calls) == 1
+
+
+def test_stale_entry_served_while_refreshed_in_background(upstream, make_endpoint):
+    ep = make_endpoint(refresh_interval=10, stale_while_revalidate=60)
+    fetch.fetch_api_data(ep)
+    key = fetch.get_cache_key(ep)
+    age_entry(key, 15)
+
+    upstream.gate = threading.Event()
+    stale = fetch.fetch_api_data(ep)
+    assert stale["stale"] and stale["age"] == 15
+    assert stale["data"] == {"call": 1}
+
+    # The refresh runs behind the response, and only once however many readers see the stale entry
+    assert wait_until(lambda: len(upstream.calls) == 2)
+    assert all(fetch.fetch_api_data(ep)["stale"] for _ in range(5))
+    upstream.gate.set()
+    assert wait_until(lambda: cache.get(f"{key}:lock") is None)
+    assert len(upstream.calls) == 2
+
+    fresh = fetch.fetch_api_data(ep)
+    assert "stale" not in fresh
+    assert fresh["data"] == {"call": 2}
+
+
+def test_expired_entry_refreshed_in_the_request(upstream, make_endpoint):
+    ep = make_endpoint(refresh_interval=10, stale_while_revalidate=60)
+    fetch.fetch_api_data(ep)
+    cache.delete(fetch.get_cache_key(ep))
+
+    result = fetch.fetch_api_data(ep)
+    assert "stale" not in result
+    assert result["data"] == {"call": 2}
+
+
+def test_errors_not_served_as_last_good_result(upstream, make_endpoint):
+    ep = make_endpoint()
+    upstream.responses.append({"data": None, "error": "HTTP 404"})
+    assert fetch.fetch_api_data(ep)["error"] == "HTTP 404"
+    assert cache_get(f"{fetch.get_cache_key(ep)}:last") is None
+
+
+# Single-flight refreshes
+
+
+def test_concurrent_misses_share_one_upstream_call(upstream, make_endpoint, settings_override):
+    settings_override(single_flight_wait=5)
+    ep = make_endpoint()
+    upstream.gate = threading.Event()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetch.fetch_api_data(ep))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    assert wait_until(lambda: len(upstream.calls) == 1)
+    upstream.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(upstream.calls) == 1
+    assert [result["data"] for result in results] == [{"call": 1}] * 5
+
+
+def test_last_good_result_served_while_another_worker_refreshes(upstream, make_endpoint, settings_override):
+    settings_override(single_flight_wait=5)
+    ep = make_endpoint()
+    fetch.fetch_api_data(ep)
+    key = fetch.get_cache_key(ep)
+    cache.delete(key)
+    cache.add(f"{key}:lock", "other-worker", 60)
+
+    started = time.monotonic()
+    result = fetch.fetch_api_data(ep)
+    assert time.monotonic() - started < 1
+    assert result["stale"] and result["data"] == {"call": 1}
+    assert len(upstream.calls) == 1
+
+
+def test_waits_for_refresh_without_last_good_result(upstream, make_endpoint, settings_override):
+    settings_override(single_flight_wait=0.2)
+    ep = make_endpoint()
+    key = fetch.get_cache_key(ep)
+    cache.add(f"{key}:lock", "other-worker", 60)
+
+    assert fetch.fetch_api_data(ep) == {"data": None, "error": "Waiting for upstream response"}
+    assert not upstream.calls
+
+    # A result written by the lock holder while waiting is returned
+    settings_override(single_flight_wait=5)
+    timer = threading.Timer(0.2, lambda: cache_set(key, {"data": 1, "error": None, "fetched_at": time.time()}, 60))
+    timer.start()
+    assert fetch.fetch_api_data(ep)["data"] == 1
+    assert not upstream.calls
+
+
+def test_lock_released_after_refresh(upstream, make_endpoint):
+    ep = make_endpoint()
+    upstream.responses.append({"data": None, "error": "Connection failed"})
+    fetch.fetch_api_data(ep)
+    assert cache.get(f"{fetch.get_cache_key(ep)}:lock") is None
+
+
+# Conditional requests
+
+FIRST = {"data": {"v": 1}, "error": None, "digest": "d1", "validators": {"etag": '"v1"', "last_modified": None}}
+NOT_MODIFIED = {"data": None, "error": None, "not_modified": True}
+
+
+def test_not_modified_reuses_last_good_result(upstream, make_endpoint):
+    ep = make_endpoint()
+    upstream.responses += [FIRST, NOT_MODIFIED]
+    first = fetch.refresh_endpoint(ep)
+    second = fetch.refresh_endpoint(ep)
+
+    assert upstream.calls[0]["validators"] is None
+    assert upstream.calls[1]["validators"] == FIRST["validators"]
+    assert (second["data"], second["digest"]) == (first["data"], first["digest"])
+    assert second["fetched_at"] >= first["fetched_at"]
+    assert "validators" not in second and "not_modified" not in second
+    assert cache_get(fetch.get_cache_key(ep)) == second
+
+
+def test_not_modified_without_last_good_result_refetches(upstream, make_endpoint):
+    ep = make_endpoint()
+    upstream.responses += [FIRST, NOT_MODIFIED, {"data": {"v": 2}, "error": None, "digest": "d2"}]
+    fetch.refresh_endpoint(ep)
+    cache.delete(f"{fetch.get_cache_key(ep)}:last")
+
+    assert fetch.refresh_endpoint(ep)["data"] == {"v": 2}
+    assert [call["validators"] for call in upstream.calls] == [None, FIRST["validators"], None]
+
+
+def test_not_modified_reuses_processed_result(upstream, make_endpoint, settings_override):
+    settings_override(cache_processed=True)
+    ep = make_endpoint(mappings=[{"field": "v", "label": "Version"}])
+    upstream.responses += [FIRST, NOT_MODIFIED]
+    first = fetch.refresh_endpoint(ep)
+    second = fetch.refresh_endpoint(ep)
+    assert second["processed"] == first["processed"]
+    assert second["processed"]["mapped_data"][0]["value"] == 1
+
+
+@pytest.mark.parametrize(
+    "attrs, conditional", [({"pagination": "next"}, True), ({}, False)], ids=["paginated", "disabled"]
+)
+def test_validators_not_sent(upstream, make_endpoint, settings_override, attrs, conditional):
+    settings_override(conditional_requests=conditional)
+    ep = make_endpoint(**attrs)
+    upstream.responses += [FIRST, FIRST]
+    fetch.refresh_endpoint(ep)
+    fetch.refresh_endpoint(ep)
+    assert [call["validators"] for call in upstream.calls] == [None, None]
+
+
+# Shared entries
+
+
+def test_equivalent_requests_share_an_entry(make_endpoint):
+    url = "https://api.example.com/items/?b=2&a=1"
+    first = make_endpoint(url=url, headers={"Accept": "application/json"}, mappings=[{"field": "a"}])
+    same = make_endpoint(url="HTTPS://API.example.com/items/?a=1&b=2", headers={"accept": " application/json"})
+    other = make_endpoint(url=url, headers={"Accept": "text/plain"})
+    assert fetch.get_cache_key(first) == fetch.get_cache_key(same)
+    assert fetch.get_cache_key(first) != fetch.get_cache_key(other)
+
+
+def test_processed_entries_not_shared(make_endpoint, settings_override):
+    settings_override(cache_processed=True)
+    first, second = make_endpoint(mappings=[{"field": "a"}]), make_endpoint(mappings=[{"field": "b"}])
+    assert fetch.get_cache_key(first) != fetch.get_cache_key(second)
+
+
+@pytest.fixture
+def streaming(settings_override):
+    pytest.importorskip("ijson")
+    settings_override(stream_json=True)
+
+
+def test_readers_register_their_paths(upstream, make_endpoint, streaming):
+    first, second = make_endpoint(mappings=[{"field": "a"}]), make_endpoint(mappings=[{"field": "b.c"}])
+    fetch.fetch_api_data(first)
+    assert upstream.calls[-1]["paths"] == [("a",)]
+
+    # The entry lacks the second endpoint's field: it is fetched again keeping both
+    fetch.fetch_api_data(second)
+    assert upstream.calls[-1]["paths"] == [("a",), ("b", "c")]
+
+    fetch.fetch_api_data(first)
+    fetch.fetch_api_data(second)
+    assert len(upstream.calls) == 2
+
+
+def test_scheduled_entries_pick_up_registered_paths(upstream, make_endpoint, streaming, settings_override):
+    settings_override(background_scheduler=True)
+    first, second = make_endpoint(mappings=[{"field": "a"}]), make_endpoint(mappings=[{"field": "b"}])
+    fetch.refresh_endpoint(first)
+
+    # Served as it is until the next scheduled refresh, which adds the missing paths
+    assert fetch.fetch_api_data(second)["data"] == {"call": 1}
+    assert len(upstream.calls) == 1
+    fetch.refresh_endpoint(first)
+    assert upstream.calls[-1]["paths"] == [("a",), ("b",)]
+
+
+def test_shared_entry_freshness_follows_the_writer(upstream, make_endpoint):
+    writer = make_endpoint(refresh_interval=10)
+    reader = make_endpoint(refresh_interval=300)
+    fetch.fetch_api_data(writer)
+    age_entry(fetch.get_cache_key(writer), 15)
+
+    upstream.gate = threading.Event()
+    assert fetch.fetch_api_data(reader)["stale"]
+    upstream.gate.set()
+    assert wait_until(lambda: cache.get(f"{fetch.get_cache_key(reader)}:lock") is None)
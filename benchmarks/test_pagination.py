@@ -0,0 +1,124 @@
+"""Behaviour checks for following upstream pagination."""
+
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from netbox_custom_widget import pagination
+
+
+def test_next_page_url_from_next_member(make_endpoint):
+    ep = make_endpoint(pagination="next")
+    page = {"next": "/items/?cursor=abc", "results": []}
+    assert pagination._next_page_url(ep, ep.url, page, {}) == "https://api.example.com/items/?cursor=abc"
+    assert pagination._next_page_url(ep, ep.url, {"next": None}, {}) is None
+
+
+def test_remaining_offset_pages_from_count(make_endpoint):
+    ep = make_endpoint(pagination="next", max_pages=10)
+    page = {"count": 250, "next": "https://api.example.com/items/?limit=100&offset=100", "results": []}
+    urls = pagination._remaining_page_urls(ep, ep.url, page, {})
+    assert [pagination._query_int(u, "offset") for u in urls] == [100, 200]
+
+
+def test_remaining_pages_capped_by_max_pages(make_endpoint):
+    ep = make_endpoint(pagination="offset", page_size=10, max_pages=3)
+    page = {"count": 1000, "results": [{}] * 10}
+    urls = pagination._remaining_page_urls(ep, ep.url + "?limit=10", page, {})
+    assert [pagination._query_int(u, "offset") for u in urls] == [10, 20]
+
+
+def test_remaining_pages_unknown_without_count(make_endpoint):
+    ep = make_endpoint(pagination="next", max_pages=10)
+    page = {"next": "https://api.example.com/items/?cursor=abc", "results": []}
+    assert pagination._remaining_page_urls(ep, ep.url, page, {}) is None
+
+
+def test_last_offset_page_is_short(make_endpoint):
+    ep = make_endpoint(pagination="offset", page_size=10, max_pages=10)
+    assert pagination._remaining_page_urls(ep, ep.url, {"count": 5, "results": [{}] * 5}, {}) == []
+
+
+def test_remaining_link_header_pages(make_endpoint):
+    ep = make_endpoint(pagination="link", max_pages=4)
+    links = {
+        "next": {"url": "https://api.example.com/items/?page=2&per_page=50"},
+        "last": {"url": "https://api.example.com/items/?page=9&per_page=50"},
+    }
+    urls = pagination._remaining_page_urls(ep, ep.url, [], links)
+    assert [pagination._query_int(u, "page") for u in urls] == [2, 3, 4]
+    assert all(pagination._query_int(u, "per_page") == 50 for u in urls)
+
+
+def test_link_header_without_numbered_last_page(make_endpoint):
+    ep = make_endpoint(pagination="link", max_pages=4)
+    links = {"next": {"url": "https://api.example.com/items/?cursor=abc"}}
+    assert pagination._remaining_page_urls(ep, ep.url, [], links) is None
+
+
+class FakePages:
+    """Stand-in for pagination.fetch_page serving pages of a list of items."""
+
+    def __init__(self, items, style, per_page=10):
+        self.items = items
+        self.style = style
+        self.per_page = per_page
+        self.urls = []
+
+    def __call__(self, endpoint, url, paths, validators=None):
+        self.urls.append(url)
+        query = dict(parse_qsl(urlsplit(url).query))
+        links = {}
+        if self.style == "offset":
+            offset, limit = int(query.get("offset", 0)), int(query.get("limit", self.per_page))
+            page = {"count": len(self.items), "results": self.items[offset : offset + limit]}
+        else:
+            cursor = int(query.get("cursor", 0))
+            chunk = self.items[cursor : cursor + self.per_page]
+            more = cursor + self.per_page < len(self.items)
+            if self.style == "next":
+                page = {"next": f"?cursor={cursor + self.per_page}" if more else None, "results": chunk}
+            else:
+                page = chunk
+                if more:
+                    links["next"] = {"url": f"https://api.example.com/items/?cursor={cursor + self.per_page}"}
+        return page, SimpleNamespace(links=links), f"digest-{url}"
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    def serve(items, style, per_page=10):
+        fake = FakePages(items, style, per_page)
+        monkeypatch.setattr(pagination, "fetch_page", fake)
+        return fake
+
+    return serve
+
+
+def test_offset_pages_fetched_and_merged_in_order(pages, make_endpoint):
+    fake = pages(list(range(25)), "offset")
+    ep = make_endpoint(pagination="offset", page_size=10)
+    items, digest = pagination.fetch_pages(ep, None)
+    assert items == list(range(25))
+    assert sorted(pagination._query_int(url, "offset") for url in fake.urls) == [0, 10, 20]
+    assert pagination.fetch_pages(ep, None) == (items, digest)
+
+
+@pytest.mark.parametrize("style", ["next", "link"])
+def test_cursor_pages_followed_one_at_a_time(pages, make_endpoint, style):
+    fake = pages(list(range(25)), style)
+    items, _ = pagination.fetch_pages(make_endpoint(pagination=style), None)
+    assert items == list(range(25))
+    assert len(fake.urls) == 3
+
+
+def test_max_pages_caps_fetched_pages(pages, make_endpoint):
+    fake = pages(list(range(100)), "offset")
+    items, _ = pagination.fetch_pages(make_endpoint(pagination="offset", page_size=10, max_pages=3), None)
+    assert items == list(range(30))
+    assert len(fake.urls) == 3
+
+    fake = pages(list(range(100)), "next")
+    items, _ = pagination.fetch_pages(make_endpoint(pagination="next", max_pages=2), None)
+    assert items == list(range(20))
@@ -0,0 +1,95 @@
+"""Behaviour checks for projecting streamed JSON responses to the mapped paths."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from prometheus_client import REGISTRY
+
+from netbox_custom_widget import fetch, projection, utils
+
+PAYLOAD = {
+    "count": 3,
+    "next": None,
+    "meta": {"host": {"name": "edge-1", "tags": ["a", "b"]}, "unused": {"big": list(range(10))}},
+    "results": [
+        {"name": "r1", "state": {"status": "Up", "queue": {"depth": 4}}, "extra": "x"},
+        {"name": "r2", "state": {"status": "Down", "queue": {"depth": 40}}},
+        {"name": "r3", "state": None},
+    ],
+}
+
+PROJECTED_FIELDS = [
+    "count",
+    "meta.host.name",
+    "meta.host.tags",
+    "meta.host.tags.1",
+    "results.0.name",
+    "results.1.state.queue.depth",
+    "results.2.state",
+    "results.2.state.status",
+    "missing.path",
+]
+
+
+def test_projection_matches_full_parse():
+    ijson = pytest.importorskip("ijson")
+    paths = {utils.split_field_path(f) for f in PROJECTED_FIELDS}
+    paths.add(("results", "*", "name"))
+    projected = projection.project_json(ijson.parse(json.dumps(PAYLOAD).encode()), paths)
+
+    for field in PROJECTED_FIELDS + ["results.1.name", "results.2.name"]:
+        assert utils.extract_field(projected, field) == utils.extract_field(PAYLOAD, field), field
+    assert "unused" not in projected["meta"]
+    assert "extra" not in projected["results"][0]
+
+
+def test_projection_of_scalar_document():
+    ijson = pytest.importorskip("ijson")
+    assert projection.project_json(ijson.parse(b"42"), {("a",)}) == 42
+
+
+def test_stream_paths_cover_mappings_and_table_rows(settings_override, make_endpoint):
+    pytest.importorskip("ijson")
+    ep = make_endpoint(display_mode="table", mappings=[{"field": "name"}], sort_by="state.status")
+    assert projection.get_stream_paths(ep) is None
+
+    settings_override(stream_json=True)
+    assert projection.get_stream_paths(ep) == {("name",), ("*", "name"), ("*", "state", "status")}
+    paged = make_endpoint(display_mode="table", mappings=[{"field": "name"}], pagination="next")
+    assert projection.get_stream_paths(paged) == {("count",), ("next",), ("*", "name"), ("results", "*", "name")}
+
+
+class TruncatedJSON(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"name": "edge-1", "state": {"status": '
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def truncated_upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TruncatedJSON)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("stream_json", [False, True])
+def test_malformed_body_reported_as_invalid_json(settings_override, make_endpoint, truncated_upstream, stream_json):
+    if stream_json:
+        pytest.importorskip("ijson")
+    settings_override(stream_json=stream_json, http_retries=0)
+    ep = make_endpoint(url=truncated_upstream, mappings=[{"field": "state.status"}])
+
+    assert fetch._request_upstream(ep) == {"data": None, "error": "Invalid JSON response"}
+    sample = {"endpoint": ep.name, "outcome": "invalid_json"}
+    assert REGISTRY.get_sample_value("custom_widget_upstream_requests_total", sample) == 1
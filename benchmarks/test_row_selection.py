@@ -0,0 +1,53 @@
+"""Behaviour checks for the where, sort and limit directives of table endpoints."""
+
+import pytest
+
+from netbox_custom_widget import utils
+
+SELECTION_ITEMS = [
+    {"name": "a", "load": 3, "site": "ams"},
+    {"name": "b", "load": "12", "site": "AMS"},
+    {"name": "c", "load": None, "site": "fra"},
+    {"name": "d", "load": 7, "site": "fra"},
+    {"name": "e", "load": "n/a", "site": "ams"},
+]
+
+
+def selected(selection):
+    return [item["name"] for item in selection.apply(SELECTION_ITEMS)]
+
+
+def test_row_filter_operators():
+    assert selected(utils.RowSelection(where=[{"field": "site", "value": "ams"}])) == ["a", "b", "e"]
+    assert selected(utils.RowSelection(where=[{"field": "load", "op": "gt", "value": 5}])) == ["b", "d"]
+    assert selected(utils.RowSelection(where=[{"field": "load", "op": "in", "value": [3, "7"]}])) == ["a", "d"]
+    where = [{"field": "site", "op": "ne", "value": "fra"}, {"field": "load", "op": "lte", "value": "3"}]
+    assert selected(utils.RowSelection(where=where)) == ["a"]
+
+
+def test_top_n_matches_full_sort():
+    for order in ("asc", "desc"):
+        full = selected(utils.RowSelection(sort_by="load", sort_order=order))
+        assert selected(utils.RowSelection(sort_by="load", sort_order=order, limit=3)) == full[:3]
+    assert selected(utils.RowSelection(sort_by="load")) == ["a", "d", "b", "e", "c"]
+    assert selected(utils.RowSelection(sort_by="load", sort_order="desc")) == ["b", "d", "a", "e", "c"]
+
+
+def test_limit_without_sort_keeps_order():
+    assert selected(utils.RowSelection(limit=2)) == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "where",
+    [{"field": "x"}, [{"op": "eq"}], [{"field": "x", "op": "like"}], [{"field": "x", "op": "in", "value": 1}]],
+)
+def test_invalid_row_filters_rejected(where):
+    with pytest.raises(ValueError):
+        utils.compile_row_filter(where)
+
+
+def test_invalid_row_filter_ignored_on_endpoint(make_endpoint):
+    ep = make_endpoint(where=[{"op": "eq"}], sort_by="load", limit=1)
+    selection = utils.RowSelection.from_endpoint(ep)
+    assert selection.predicate is None
+    assert selected(selection) == ["a"]
@@ -0,0 +1,213 @@
+"""Behaviour checks for the background refresh scheduler."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+
+from netbox_custom_widget import endpoint_cache, scheduler
+from netbox_custom_widget.fetch import get_cache_key
+
+
+class RecordingExecutor:
+    """Stand-in for the scheduler's thread pool recording the refreshes submitted to it."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, key, endpoint):
+        self.submitted.append(key)
+
+
+@pytest.fixture
+def executor():
+    return RecordingExecutor()
+
+
+def test_load_groups_endpoints_by_cache_key(endpoint_store, make_endpoint):
+    slow = make_endpoint(refresh_interval=60)
+    fast = make_endpoint(refresh_interval=20)
+    other = make_endpoint(url="https://api.example.com/other/")
+    endpoint_store(slow, fast, other, make_endpoint(refresh_interval=0))
+
+    refresh = scheduler.RefreshScheduler(jitter=0)
+    refresh.load()
+
+    # Endpoints making the same request are refreshed once, at the shortest interval
+    assert refresh.groups == {get_cache_key(fast): fast, get_cache_key(other): other}
+
+
+def test_removed_endpoints_unscheduled(endpoint_store, make_endpoint, executor):
+    kept, removed = make_endpoint(), make_endpoint(url="https://api.example.com/other/")
+    endpoint_store(kept, removed)
+    refresh = scheduler.RefreshScheduler(jitter=0)
+    refresh.load()
+
+    endpoint_store(kept)
+    refresh.load()
+    refresh.run_pending(executor, float("inf"))
+    assert executor.submitted == [get_cache_key(kept)]
+
+
+@pytest.mark.parametrize(
+    "interval, result, delay",
+    [
+        (30, {"data": 1, "error": None}, 28),
+        (3, {"data": 1, "error": None}, 1.5),
+        (30, None, 28),
+        (30, {"data": None, "error": "HTTP 500"}, scheduler.ERROR_RETRY_INTERVAL),
+        (30, {"data": 1, "error": None, "stale": True}, scheduler.ERROR_RETRY_INTERVAL),
+        (3, {"data": None, "error": "HTTP 500"}, 3),
+    ],
+    ids=["lead-time", "half-interval", "no-result", "error", "stale", "error-short-interval"],
+)
+def test_next_delay(make_endpoint, interval, result, delay):
+    refresh = scheduler.RefreshScheduler(lead_time=2, jitter=0)
+    assert refresh._next_delay(make_endpoint(refresh_interval=interval), result) == delay
+
+
+def test_next_delay_jitter(make_endpoint):
+    refresh = scheduler.RefreshScheduler(lead_time=2, jitter=1)
+    delays = {refresh._next_delay(make_endpoint(refresh_interval=30), None) for _ in range(20)}
+    assert all(27 <= delay <= 28 for delay in delays)
+    assert len(delays) > 1
+
+
+def test_run_pending_respects_worker_limit(endpoint_store, make_endpoint, executor):
+    endpoints = [make_endpoint(url=f"https://api.example.com/{n}/") for n in range(3)]
+    endpoint_store(*endpoints)
+    refresh = scheduler.RefreshScheduler(workers=2, jitter=0)
+    refresh.load()
+
+    refresh.run_pending(executor, float("inf"))
+    assert len(executor.submitted) == 2
+    refresh.run_pending(executor, float("inf"))
+    assert len(executor.submitted) == 2
+
+    # A finished refresh frees a worker for the group still waiting
+    refresh._finish(executor.submitted[0], {"data": 1, "error": None})
+    refresh.run_pending(executor, float("inf"))
+    assert sorted(executor.submitted) == sorted(get_cache_key(endpoint) for endpoint in endpoints)
+
+
+def test_run_pending_respects_due_times(endpoint_store, make_endpoint, executor, monkeypatch):
+    endpoint = make_endpoint(refresh_interval=30)
+    endpoint_store(endpoint)
+    refresh = scheduler.RefreshScheduler(lead_time=2, jitter=0)
+    monkeypatch.setattr(scheduler, "time", SimpleNamespace(monotonic=lambda: 100.0))
+    refresh.load()
+
+    refresh.run_pending(executor, 100.0)
+    refresh._finish(get_cache_key(endpoint), {"data": 1, "error": None})
+    refresh.run_pending(executor, 127.9)
+    assert len(executor.submitted) == 1
+    refresh.run_pending(executor, 128.0)
+    assert len(executor.submitted) == 2
+
+
+def test_failed_refresh_retried_sooner(endpoint_store, make_endpoint, monkeypatch):
+    endpoint = make_endpoint(refresh_interval=30)
+    endpoint_store(endpoint)
+
+    def fail(endpoint):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(scheduler, "refresh_endpoint", fail)
+    monkeypatch.setattr(scheduler, "time", SimpleNamespace(monotonic=lambda: 100.0))
+    refresh = scheduler.RefreshScheduler(jitter=0)
+    refresh.load()
+    key = get_cache_key(endpoint)
+
+    refresh._refresh(key, endpoint)
+    refresh._finish(*refresh._done.get_nowait())
+    assert refresh._due == {key: 100.0 + scheduler.ERROR_RETRY_INTERVAL}
+
+
+def test_sync_reloads_on_config_change(endpoint_store, make_endpoint):
+    store = endpoint_store(make_endpoint())
+    refresh = scheduler.RefreshScheduler()
+
+    refresh.sync(0)
+    refresh.sync(1)
+    assert store.queries == 1
+
+    endpoint_cache._bump_version()
+    refresh.sync(2)
+    assert store.queries == 2
+
+    # Reloaded periodically even without a change
+    refresh.sync(2 + scheduler.CONFIG_RELOAD_INTERVAL)
+    assert store.queries == 3
+
+
+# Scheduler lease
+
+
+def test_lease_held_by_one_owner():
+    first, second = scheduler.Lease("test", 60, owner="first"), scheduler.Lease("test", 60, owner="second")
+    assert first.acquire()
+    assert first.acquire() and first.renew()
+    assert not second.acquire() and not second.renew()
+
+    # Releasing is a no-op for other owners
+    second.release()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    assert not first.renew()
+
+
+def test_leadership_changes(endpoint_store, make_endpoint):
+    endpoint_store(make_endpoint())
+    leader, standby = scheduler.RefreshScheduler(), scheduler.RefreshScheduler()
+    ttl = leader.lease.ttl
+    assert leader.elect(0)
+    assert not standby.elect(0)
+    leader.sync(0)
+    assert leader.groups
+
+    # Renewed every third of the TTL only, so the lease is not checked in between
+    cache.set(leader.lease.key, standby.lease.owner, ttl)
+    assert leader.elect(ttl / 3 - 1)
+    assert not leader.elect(ttl / 3)
+    assert leader.groups == {} and not leader._heap
+    assert standby.elect(ttl / 3)
+
+
+def test_refresh_all_skipped_without_lease(endpoint_store, make_endpoint, monkeypatch):
+    endpoint_store(make_endpoint())
+    monkeypatch.setattr(scheduler, "refresh_endpoint", lambda endpoint: pytest.fail("refreshed without the lease"))
+    assert scheduler.Lease(scheduler.SCHEDULER_LEASE, 60, owner="other").acquire()
+    assert scheduler.RefreshScheduler().refresh_all() is None
+
+
+def test_refresh_all_renews_lease(endpoint_store, make_endpoint, settings_override, monkeypatch):
+    settings_override(scheduler_lease_ttl=0.3)
+    endpoint_store(make_endpoint())
+    standby = scheduler.Lease(scheduler.SCHEDULER_LEASE, 0.3, owner="standby")
+    taken = []
+
+    def slow_refresh(endpoint):
+        time.sleep(0.8)
+        taken.append(standby.acquire())
+        return {"data": 1, "error": None}
+
+    monkeypatch.setattr(scheduler, "refresh_endpoint", slow_refresh)
+    assert scheduler.RefreshScheduler().refresh_all() == 1
+    assert taken == [False]
+    assert standby.acquire()
+
+
+def test_refresh_all_stops_when_lease_lost(endpoint_store, make_endpoint, settings_override, monkeypatch):
+    settings_override(scheduler_lease_ttl=0.3)
+    endpoint_store(*[make_endpoint(url=f"https://api.example.com/{n}/") for n in range(3)])
+
+    def lose_lease(endpoint):
+        cache.set(f"custom_widget:lease:{scheduler.SCHEDULER_LEASE}", "other", 60)
+        time.sleep(0.3)
+        return {"data": 1, "error": None}
+
+    monkeypatch.setattr(scheduler, "refresh_endpoint", lose_lease)
+    assert scheduler.RefreshScheduler(workers=1).refresh_all() == 1
+    assert cache.get(f"custom_widget:lease:{scheduler.SCHEDULER_LEASE}") == "other"
@@ -0,0 +1,68 @@
+"""Behaviour checks for server-side paging, sorting and filtering of table widgets."""
+
+import pytest
+
+from netbox_custom_widget import utils
+
+TABLE_MAPPINGS = [
+    {"field": "name", "label": "Name"},
+    {"field": "queued", "label": "Queued", "format": "number"},
+    {"field": "uptime", "label": "Uptime", "format": "duration"},
+]
+TABLE_ITEMS = [
+    {"name": "alpha", "queued": 1200, "uptime": "2.00:00:00"},
+    {"name": "Bravo", "queued": 9, "uptime": 3600},
+    {"name": "charlie", "queued": None, "uptime": "P1D"},
+    {"name": "delta", "queued": 150, "uptime": None},
+]
+
+
+@pytest.fixture(params=["rows", "columnar"])
+def table(request):
+    if request.param == "rows":
+        return utils.process_array_mappings(TABLE_ITEMS, TABLE_MAPPINGS)
+    return utils.process_array_columns(TABLE_ITEMS, TABLE_MAPPINGS)
+
+
+def names(result):
+    return [row[0]["value"] for row in result["rows"]]
+
+
+def test_sort_numbers_on_raw_values(table):
+    assert names(utils.paginate_table(table, sort=1, per_page=0)) == ["Bravo", "delta", "alpha", "charlie"]
+    assert names(utils.paginate_table(table, sort=1, order="desc", per_page=0)) == [
+        "alpha",
+        "delta",
+        "Bravo",
+        "charlie",
+    ]
+
+
+def test_sort_durations_by_length(table):
+    assert names(utils.paginate_table(table, sort=2, per_page=0)) == ["Bravo", "charlie", "alpha", "delta"]
+
+
+def test_sort_text_case_insensitively(table):
+    assert names(utils.paginate_table(table, sort=0, order="desc", per_page=0)) == [
+        "delta",
+        "charlie",
+        "Bravo",
+        "alpha",
+    ]
+
+
+def test_filter_and_page(table):
+    result = utils.paginate_table(table, page=2, sort=0, q="A", per_page=2)
+    assert result["count"] == 4 and result["total"] == 4
+    assert (result["page"], result["num_pages"], result["previous_page"], result["next_page"]) == (2, 2, 1, None)
+    assert names(result) == ["charlie", "delta"]
+
+    result = utils.paginate_table(table, q="brav", per_page=2)
+    assert names(result) == ["Bravo"]
+    assert result["filter_query"] == "q=brav"
+
+
+def test_page_clamped_and_bad_sort_ignored(table):
+    result = utils.paginate_table(table, page=99, sort=7, order="sideways", per_page=3)
+    assert (result["page"], result["sort"], result["order"]) == (2, None, "asc")
+    assert names(result) == ["delta"]
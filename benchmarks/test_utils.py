@@ -0,0 +1,108 @@
+"""Micro-benchmarks for the mapping, coloring and formatting hot paths in utils."""
+
+import random
+
+import pytest
+
+from netbox_custom_widget import utils
+
+ROW_COUNTS = [10, 1000, 100000]
+
+STATUSES = ["Active", "Running", "Down", "Standby", "In Service", "not active", "Unknown", None]
+DURATIONS = ["7.18:25:31.4904775", "18:25:31", "P7DT18H25M31S", 640531, 640531000, "7 days"]
+THRESHOLDS = [
+    {"lt": 5, "color": "green"},
+    {"lt": 15, "color": "orange"},
+    {"gt": 100, "color": "purple"},
+    {"color": "red"},
+]
+
+SHALLOW_MAPPINGS = [
+    {"field": "name", "label": "Name"},
+    {"field": "status", "label": "Status", "color": "adaptive"},
+    {"field": "queued", "label": "Queued", "color": "threshold", "thresholds": THRESHOLDS, "format": "number"},
+    {"field": "uptime", "label": "Uptime", "format": "duration"},
+]
+DEEP_MAPPINGS = [
+    {"field": "meta.host.site.name", "label": "Site"},
+    {"field": "meta.host.state.status", "label": "Status", "color": "adaptive"},
+    {"field": "meta.host.state.queue.depth", "label": "Queued", "color": "threshold", "thresholds": THRESHOLDS},
+    {"field": "meta.host.state.uptime", "label": "Uptime", "format": "duration"},
+]
+
+
+def make_rows(count, seed=0):
+    """Synthetic table rows carrying the same values at a shallow and a deep path."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        status = rng.choice(STATUSES)
+        queued = rng.randint(0, 200)
+        uptime = rng.choice(DURATIONS)
+        rows.append(
+            {
+                "name": f"host-{i}",
+                "status": status,
+                "queued": queued,
+                "uptime": uptime,
+                "meta": {
+                    "host": {
+                        "site": {"name": f"site-{i % 50}"},
+                        "state": {"status": status, "queue": {"depth": queued}, "uptime": uptime},
+                    }
+                },
+            }
+        )
+    return rows
+
+
+@pytest.fixture(scope="module", params=ROW_COUNTS, ids=lambda n: f"{n}rows")
+def rows(request):
+    return make_rows(request.param)
+
+
+def run(benchmark, func, *args):
+    """Use fixed rounds for the large inputs so the suite stays quick."""
+    if len(args[0]) >= 100000:
+        return benchmark.pedantic(func, args=args, rounds=3, iterations=1)
+    return benchmark(func, *args)
+
+
+@pytest.mark.parametrize("path", ["status", "meta.host.state.queue.depth"], ids=["shallow", "deep"])
+def test_extract_field(benchmark, path):
+    row = make_rows(1)[0]
+    benchmark(utils.extract_field, row, path)
+
+
+@pytest.mark.parametrize("mappings", [SHALLOW_MAPPINGS, DEEP_MAPPINGS], ids=["shallow", "deep"])
+def test_process_array_mappings_rows(benchmark, settings_override, rows, mappings):
+    settings_override(columnar_threshold=0)
+    run(benchmark, utils.process_array_mappings, rows, utils.MappingPlan(mappings))
+
+
+@pytest.mark.parametrize("mappings", [SHALLOW_MAPPINGS, DEEP_MAPPINGS], ids=["shallow", "deep"])
+def test_process_array_columns(benchmark, rows, mappings):
+    plan = utils.MappingPlan(mappings)
+    run(benchmark, lambda data, p: utils.process_array_columns(data, p).rows, rows, plan)
+
+
+@pytest.mark.parametrize("mappings", [SHALLOW_MAPPINGS, DEEP_MAPPINGS], ids=["shallow", "deep"])
+def test_process_mappings(benchmark, rows, mappings):
+    # One mapping per row, addressed by index as in list/grid widgets
+    indexed = [dict(m, field=f"{i}.{m['field']}") for i in range(min(len(rows), 1000)) for m in mappings[:1]]
+    run(benchmark, utils.process_mappings, rows, utils.MappingPlan(indexed))
+
+
+def test_get_adaptive_color(benchmark, rows):
+    values = [row["status"] for row in rows]
+    run(benchmark, lambda vals: [utils.get_adaptive_color(v) for v in vals], values)
+
+
+def test_get_threshold_color(benchmark, rows):
+    values = [row["queued"] for row in rows]
+    run(benchmark, lambda vals: [utils.get_threshold_color(v, THRESHOLDS) for v in vals], values)
+
+
+def test_format_duration(benchmark, rows):
+    values = [row["uptime"] for row in rows]
+    run(benchmark, lambda vals: [utils.format_duration(v) for v in vals], values)
@@ -7,7 +7,7 @@ Configurable dashboard widgets for calling external APIs and displaying results.
 import logging
 
 from django.conf import settings
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from netbox.plugins import PluginConfig
 
 __version__ = "0.7.0"
@@ -40,9 +40,18 @@ def provision_endpoints(sender, **kwargs):
                 "http_method": ep_config.get("http_method", "GET"),
                 "headers": ep_config.get("headers", {}),
                 "body": ep_config.get("body", ""),
+                "pagination": ep_config.get("pagination", "none"),
+                "results_field": ep_config.get("results_field", "results"),
+                "page_size": ep_config.get("page_size", 100),
+                "max_pages": ep_config.get("max_pages", 10),
                 "mappings": ep_config.get("mappings", []),
                 "display_mode": ep_config.get("display_mode", "list"),
                 "refresh_interval": ep_config.get("refresh_interval", 30),
+                "stale_while_revalidate": ep_config.get("stale_while_revalidate", 0),
+                "where": ep_config.get("where", []),
+                "sort_by": ep_config.get("sort_by", ""),
+                "sort_order": ep_config.get("sort_order", "asc"),
+                "limit": ep_config.get("limit", 0),
                 "verify_ssl": ep_config.get("verify_ssl", global_verify_ssl),
                 "timeout": ep_config.get("timeout", 30),
                 "link": ep_config.get("link", ""),
@@ -76,19 +85,56 @@ class CustomWidgetConfig(PluginConfig):
     author_email = "jeremy.worden@gmail.com"
     base_url = "custom-widget"
     min_version = "4.0.0"
-    javascript = ("netbox_custom_widget/js/prevent_double_submit.js",)
+    javascript = (
+        "netbox_custom_widget/js/prevent_double_submit.js",
+        "netbox_custom_widget/js/batch_refresh.js",
+    )
 
     required_settings = []
 
     default_settings = {
         "verify_ssl": True,
         "endpoints": [],
+        "columnar_threshold": 1000,
+        "table_page_size": 50,
+        "adaptive_keywords": None,
+        "single_flight_wait": 5,
+        "background_refresh_workers": 4,
+        "http_pool_size": 10,
+        "http_retries": 1,
+        "http_idle_timeout": 300,
+        "circuit_failure_threshold": 3,
+        "circuit_backoff": 10,
+        "circuit_backoff_max": 300,
+        "fetch_concurrency": 16,
+        "fetch_per_host_limit": 4,
+        "page_fetch_workers": 8,
+        "batch_refresh": True,
+        "max_response_size": 0,
+        "stream_json": True,
+        "conditional_requests": True,
+        "cache_processed": False,
+        "cache_codec": "zlib",
+        "cache_compress_threshold": 16384,
+        "cache_compress_level": None,
+        "endpoint_cache_ttl": 300,
+        "background_scheduler": False,
+        "scheduler_workers": 4,
+        "scheduler_lead_time": 2,
+        "scheduler_jitter": 1,
+        "scheduler_lease_ttl": 15,
     }
 
     def ready(self):
-        """Register signal and import widgets."""
+        """Register signals and import widgets."""
         super().ready()
         post_migrate.connect(provision_endpoints, sender=self)
+
+        from .endpoint_cache import invalidate_endpoint
+        from .models import CustomAPIEndpoint
+
+        post_save.connect(invalidate_endpoint, sender=CustomAPIEndpoint)
+        post_delete.connect(invalidate_endpoint, sender=CustomAPIEndpoint)
         from . import widgets  # noqa: F401
 
 
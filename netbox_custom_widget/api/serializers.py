@@ -25,9 +25,18 @@ class CustomAPIEndpointSerializer(NetBoxModelSerializer):
             "http_method",
             "headers",
             "body",
+            "pagination",
+            "results_field",
+            "page_size",
+            "max_pages",
             "mappings",
             "display_mode",
             "refresh_interval",
+            "stale_while_revalidate",
+            "where",
+            "sort_by",
+            "sort_order",
+            "limit",
             "link",
             "verify_ssl",
             "timeout",
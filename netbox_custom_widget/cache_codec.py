@@ -0,0 +1,104 @@
+"""Serialization and optional compression of the plugin's cache entries."""
+
+import logging
+import pickle
+import threading
+import zlib
+
+from django.core.cache import cache
+
+from . import metrics
+from .utils import get_plugin_setting
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+# Leading byte of encoded cache entries identifying their codec
+_CODEC_PICKLE = b"P"
+_CODEC_ZLIB = b"Z"
+_CODEC_ZSTD = b"S"
+
+# Process-local codec statistics, see get_cache_codec_stats()
+_codec_stats = {"entries": 0, "compressed": 0, "raw_bytes": 0, "stored_bytes": 0}
+_codec_stats_lock = threading.Lock()
+
+
+def encode_cache_value(value):
+    """
+    Serialize a value for the plugin's cache entries.
+
+    Values are pickled, and payloads of at least "cache_compress_threshold"
+    bytes are compressed with the "cache_codec" setting ("zlib", "zstd" when
+    the zstandard package is installed, or "none").
+    """
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    encoded = _CODEC_PICKLE + payload
+
+    codec = get_plugin_setting("cache_codec", "zlib")
+    threshold = get_plugin_setting("cache_compress_threshold", 16 * 1024)
+    if codec != "none" and len(payload) >= threshold:
+        level = get_plugin_setting("cache_compress_level")
+        if codec == "zstd" and zstandard is not None:
+            compressed = _CODEC_ZSTD + zstandard.ZstdCompressor(level=level or 3).compress(payload)
+        else:
+            compressed = _CODEC_ZLIB + zlib.compress(payload, level or 6)
+        if len(compressed) < len(encoded):
+            encoded = compressed
+
+    metrics.cache_codec_bytes.labels("raw").inc(len(payload))
+    metrics.cache_codec_bytes.labels("stored").inc(len(encoded))
+    with _codec_stats_lock:
+        _codec_stats["entries"] += 1
+        _codec_stats["compressed"] += encoded[:1] != _CODEC_PICKLE
+        _codec_stats["raw_bytes"] += len(payload)
+        _codec_stats["stored_bytes"] += len(encoded)
+    return encoded
+
+
+def decode_cache_value(encoded):
+    """
+    Reverse encode_cache_value. Values not written through the codec are returned as-is.
+
+    Entries this process cannot decode (zstd-compressed without the zstandard
+    package installed, or corrupt) are logged and treated as a miss (None).
+    """
+    if not isinstance(encoded, bytes) or not encoded:
+        return encoded
+    marker, payload = encoded[:1], encoded[1:]
+    try:
+        if marker == _CODEC_ZLIB:
+            payload = zlib.decompress(payload)
+        elif marker == _CODEC_ZSTD:
+            if zstandard is None:
+                logger.warning("Ignoring zstd-compressed cache entry: the zstandard package is not installed")
+                return None
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif marker != _CODEC_PICKLE:
+            return encoded
+        return pickle.loads(payload)
+    except Exception as e:
+        logger.warning(f"Ignoring undecodable cache entry: {e}")
+        return None
+
+
+def cache_get(key):
+    """Read a plugin cache entry written by cache_set."""
+    return decode_cache_value(cache.get(key))
+
+
+def cache_set(key, value, timeout):
+    """Write a plugin cache entry through the configured codec."""
+    cache.set(key, encode_cache_value(value), timeout)
+
+
+def get_cache_codec_stats():
+    """Return this process's cache codec counters, including the bytes saved by compression."""
+    with _codec_stats_lock:
+        stats = dict(_codec_stats)
+    stats["bytes_saved"] = stats["raw_bytes"] - stats["stored_bytes"]
+    return stats
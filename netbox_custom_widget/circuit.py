@@ -0,0 +1,99 @@
+"""Per-endpoint and per-host circuit breakers shared across workers through the Django cache."""
+
+import time
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+
+from .http import fetch_budget
+from .utils import get_plugin_setting
+
+# Circuit breaker counters are kept at least this long after the first failure
+CIRCUIT_STATE_TTL_MIN = 3600
+
+
+def _circuit_keys(endpoint):
+    """Cache keys of the circuit breakers guarding an endpoint: its own and its upstream host's."""
+    host = urlsplit(endpoint.url).netloc.lower()
+    return [f"custom_widget:circuit:endpoint:{endpoint.pk}", f"custom_widget:circuit:host:{host}"]
+
+
+def _incr_counter(key, ttl):
+    """Atomically increment a counter in the cache, creating it with the given TTL, and return its new value."""
+    if cache.add(key, 1, ttl):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between the add and the incr
+        cache.add(key, 1, ttl)
+        return 1
+
+
+def check_circuits(endpoint):
+    """
+    Check the circuit breakers guarding an endpoint before a request.
+
+    A circuit opens after "circuit_failure_threshold" consecutive failures.
+    Once its backoff has elapsed it is half-open: a single caller (across all
+    workers) claims the probe and is let through, the others keep waiting.
+
+    Returns:
+        Tuple of (retry_after, circuits): the seconds until an open circuit
+        lets a request through, or None if the request may go ahead, and the
+        circuit states to pass to record_circuit_result afterwards
+    """
+    threshold = get_plugin_setting("circuit_failure_threshold", 3)
+    if not threshold:
+        return None, {}
+
+    keys = _circuit_keys(endpoint)
+    states = cache.get_many([f"{key}:{field}" for key in keys for field in ("failures", "open_until")])
+    now = time.time()
+    circuits = {}
+    for key in keys:
+        failures = states.get(f"{key}:failures", 0)
+        probing = False
+        if failures >= threshold:
+            open_until = states.get(f"{key}:open_until", 0)
+            retry_after = open_until - now if open_until > now else None
+            if retry_after is None and not cache.add(f"{key}:probe", 1, fetch_budget(endpoint) + 5):
+                retry_after = 1
+            if retry_after is not None:
+                # Hand back any probe claimed on an earlier circuit
+                cache.delete_many([f"{k}:probe" for k, circuit in circuits.items() if circuit["probing"]])
+                return retry_after, {}
+            probing = True
+        circuits[key] = {"failures": failures, "probing": probing}
+    return None, circuits
+
+
+def record_circuit_result(circuits, failed):
+    """
+    Update an endpoint's circuit breakers after an upstream request.
+
+    Successes close the circuits. Failures are counted with cache.incr, so
+    concurrent failures from several workers all count. The circuit opens
+    when the count reaches the threshold, and each failed half-open probe
+    opens it again for twice as long, from "circuit_backoff" up to
+    "circuit_backoff_max" seconds.
+    """
+    if not circuits:
+        return
+
+    threshold = get_plugin_setting("circuit_failure_threshold", 3)
+    backoff = get_plugin_setting("circuit_backoff", 10)
+    backoff_max = get_plugin_setting("circuit_backoff_max", 300)
+    ttl = max(backoff_max * 2, CIRCUIT_STATE_TTL_MIN)
+    for key, circuit in circuits.items():
+        if not failed:
+            if circuit["failures"]:
+                cache.delete_many([f"{key}:failures", f"{key}:trips", f"{key}:open_until", f"{key}:probe"])
+            continue
+
+        failures = _incr_counter(f"{key}:failures", ttl)
+        if failures == threshold or (circuit["probing"] and failures > threshold):
+            trips = _incr_counter(f"{key}:trips", ttl)
+            cache.set(f"{key}:open_until", time.time() + min(backoff * 2 ** (trips - 1), backoff_max), ttl)
+        if circuit["probing"]:
+            cache.delete(f"{key}:probe")
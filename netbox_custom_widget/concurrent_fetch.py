@@ -0,0 +1,112 @@
+"""Asyncio engine fetching several endpoints concurrently."""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .fetch import fetch_api_data
+from .http import fetch_budget
+from .utils import get_executor, get_plugin_setting
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentFetcher:
+    """
+    Asyncio engine fetching several endpoints concurrently.
+
+    Each endpoint is fetched through fetch_func (fetch_api_data by default, so
+    caching and single-flight locking still apply) on a shared thread pool.
+    Concurrency is capped per upstream host, and every fetch is bounded by the
+    endpoint's timeout (times max_pages for paginated endpoints) and by an
+    optional overall deadline, so a batch takes about as long as its slowest
+    endpoint rather than the sum of all of them.
+    A fetch that times out keeps its host slot until its thread finishes, so
+    the cap also bounds the requests still running upstream.
+
+    Args:
+        fetch_func: Blocking callable taking an endpoint and returning a result dict
+        per_host_limit: Maximum concurrent fetches per scheme/host
+            (defaults to the "fetch_per_host_limit" plugin setting)
+    """
+
+    def __init__(self, fetch_func=None, per_host_limit=None):
+        self.fetch_func = fetch_func or fetch_api_data
+        self.per_host_limit = per_host_limit or get_plugin_setting("fetch_per_host_limit", 4)
+
+    async def _fetch_in_slot(self, endpoint, semaphore):
+        loop = asyncio.get_running_loop()
+        await semaphore.acquire()
+        try:
+            future = loop.run_in_executor(get_executor("fetch", "fetch_concurrency", 16), self.fetch_func, endpoint)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The worker thread carries on after a timeout, so it keeps its host slot until it is done
+        future.add_done_callback(lambda _: semaphore.release())
+        # The endpoint's own timeout only starts once a slot is free
+        return await asyncio.wait_for(asyncio.shield(future), fetch_budget(endpoint) + 1)
+
+    async def _fetch_one(self, endpoint, semaphore, deadline, deadline_at):
+        loop = asyncio.get_running_loop()
+        # The overall deadline also covers the wait for a host slot
+        remaining = max(deadline_at - loop.time(), 0) if deadline_at is not None else None
+
+        try:
+            return await asyncio.wait_for(self._fetch_in_slot(endpoint, semaphore), remaining)
+        except asyncio.TimeoutError:
+            if deadline_at is not None and loop.time() >= deadline_at:
+                return {"data": None, "error": f"Request timed out (batch deadline of {deadline:g}s)"}
+            return {"data": None, "error": f"Request timed out ({fetch_budget(endpoint)}s)"}
+        except Exception as e:
+            logger.warning(f"API call failed for {endpoint.name}: {e}")
+            return {"data": None, "error": str(e)}
+
+    async def fetch_async(self, endpoints, deadline=None):
+        """
+        Fetch endpoints concurrently from a running event loop.
+
+        Args:
+            endpoints: Iterable of CustomAPIEndpoint instances
+            deadline: Optional overall time budget in seconds
+
+        Returns:
+            dict mapping endpoint pk to its result dict
+        """
+        endpoints = list(endpoints)
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline if deadline is not None else None
+
+        semaphores = {}
+        tasks = []
+        for endpoint in endpoints:
+            parts = urlsplit(endpoint.url)
+            host = (parts.scheme.lower(), parts.netloc.lower())
+            if host not in semaphores:
+                semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+            tasks.append(self._fetch_one(endpoint, semaphores[host], deadline, deadline_at))
+
+        results = await asyncio.gather(*tasks)
+        return {endpoint.pk: result for endpoint, result in zip(endpoints, results)}
+
+    def fetch(self, endpoints, deadline=None):
+        """Synchronous wrapper around fetch_async for use from Django views."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_async(endpoints, deadline))
+
+        # Already inside an event loop (e.g. under ASGI): run on a separate thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.fetch_async(endpoints, deadline)).result()
+
+
+def fetch_many(endpoints, deadline=None):
+    """
+    Fetch several endpoints concurrently from synchronous code.
+
+    Returns:
+        dict mapping endpoint pk to the fetch_api_data result dict
+    """
+    return ConcurrentFetcher().fetch(endpoints, deadline)
@@ -0,0 +1,121 @@
+"""Process-local cache of CustomAPIEndpoint configurations."""
+
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CustomAPIEndpoint
+from .utils import get_plugin_setting
+
+logger = logging.getLogger(__name__)
+
+# Shared token replaced on every endpoint change; workers compare it with the
+# version their local cache was filled under and drop everything when it moves.
+# Random tokens never repeat, so an evicted key cannot bring back an old version.
+VERSION_CACHE_KEY = "netbox_custom_widget:endpoint_config_version"
+
+# How often, in seconds, each worker reads the shared version token
+VERSION_CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_entries = {}
+_version = None
+_version_checked = float("-inf")
+
+
+def _get_shared_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        token = uuid.uuid4().hex
+        cache.add(VERSION_CACHE_KEY, token, None)
+        version = cache.get(VERSION_CACHE_KEY, token)
+    return version
+
+
+def get_config_version():
+    """Return the shared endpoint configuration version, which moves whenever an endpoint is saved or deleted."""
+    return _get_shared_version()
+
+
+def _sync_version(now):
+    """Clear the local cache if another worker changed an endpoint since the last check."""
+    global _version, _version_checked
+
+    if now - _version_checked < VERSION_CHECK_INTERVAL:
+        return
+    version = _get_shared_version()
+    with _lock:
+        if version != _version:
+            _entries.clear()
+            _version = version
+        _version_checked = now
+
+
+def get_endpoints(pks):
+    """
+    Return a dict of pk -> CustomAPIEndpoint for the given pks.
+
+    Configurations are served from a per-process cache and only missing or
+    expired pks are loaded, with a single query. Entries are invalidated by
+    the post_save/post_delete handler below, and other workers see the change
+    through a version token in the shared Django cache. Unknown pks are
+    left out of the result.
+    """
+    pks = set(pks)
+    ttl = get_plugin_setting("endpoint_cache_ttl", 300)
+    if not ttl or not pks:
+        return CustomAPIEndpoint.objects.in_bulk(pks) if pks else {}
+
+    now = time.monotonic()
+    _sync_version(now)
+
+    found = {}
+    with _lock:
+        version = _version
+        for pk in pks:
+            entry = _entries.get(pk)
+            if entry is not None and entry[0] > now:
+                found[pk] = entry[1]
+
+    missing = pks.difference(found)
+    if missing:
+        loaded = CustomAPIEndpoint.objects.in_bulk(missing)
+        found.update(loaded)
+        with _lock:
+            # Skip the store if an invalidation ran while the rows were loading
+            if version == _version:
+                for pk, endpoint in loaded.items():
+                    _entries[pk] = (now + ttl, endpoint)
+
+    return found
+
+
+def get_endpoint(pk):
+    """Return the CustomAPIEndpoint with the given pk from the cache, or None if it does not exist."""
+    return get_endpoints([pk]).get(pk)
+
+
+def _bump_version():
+    global _version, _version_checked
+
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+    with _lock:
+        _entries.clear()
+        # Abandons in-flight loads and forces a version check on the next lookup
+        _version = None
+        _version_checked = float("-inf")
+
+
+def invalidate_endpoint(sender, instance, **kwargs):
+    """
+    post_save/post_delete handler for CustomAPIEndpoint.
+
+    Runs once the transaction commits, so no worker can reload the old row
+    after the version has moved.
+    """
+    transaction.on_commit(_bump_version)
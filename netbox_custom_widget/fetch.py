@@ -0,0 +1,484 @@
+"""Cached, single-flight fetching of endpoint results from their upstream APIs."""
+
+import hashlib
+import json
+import logging
+import math
+import time
+import uuid
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from . import metrics
+from .cache_codec import cache_get, cache_set, encode_cache_value
+from .circuit import check_circuits, record_circuit_result
+from .http import NotModified, ResponseTooLarge, fetch_budget, fetch_page
+from .pagination import fetch_pages
+from .projection import get_stream_paths
+from .utils import get_executor, get_plugin_setting, process_result
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Seconds between cache checks while another caller holds the refresh lock
+SINGLE_FLIGHT_POLL_INTERVAL = 0.1
+
+# The last successful result is kept for this multiple of refresh_interval
+# (and at least LAST_GOOD_TTL_MIN seconds) for callers waiting on a refresh
+LAST_GOOD_TTL_FACTOR = 10
+LAST_GOOD_TTL_MIN = 300
+
+# Part of the processed cache keys; bump it when the shape of process_result output changes
+PROCESSED_FORMAT_VERSION = 2
+
+
+def _canonical_request(endpoint):
+    """
+    Return a canonical description of the upstream request an endpoint makes.
+
+    Scheme and host are lowercased, query parameters are ordered by name,
+    header names are lowercased and values stripped, and the body only counts
+    for POST requests, so equivalent configurations compare equal.
+    """
+    parts = urlsplit(endpoint.url.strip())
+    userinfo, at, host = parts.netloc.rpartition("@")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True), key=lambda kv: kv[0]))
+    url = urlunsplit((parts.scheme.lower(), f"{userinfo}{at}{host.lower()}", parts.path or "/", query, ""))
+
+    headers = dict(endpoint.headers or {})
+    body = ""
+    if endpoint.http_method == "POST" and endpoint.body:
+        body = endpoint.body
+        headers.setdefault("Content-Type", "application/json")
+    headers = sorted((str(k).strip().lower(), str(v).strip()) for k, v in headers.items())
+
+    request = [endpoint.http_method, url, headers, body, bool(endpoint.verify_ssl)]
+    if endpoint.pagination != "none":
+        request += [endpoint.pagination, endpoint.results_field, endpoint.page_size, endpoint.max_pages]
+    return request
+
+
+def _make_cache_key(endpoint):
+    """
+    Build the cache key for an endpoint's upstream result.
+
+    The key covers the canonical request rather than the endpoint, so
+    endpoints making identical requests share one cached result, one
+    single-flight lock and one upstream call, whatever their mappings. When
+    responses are projected while streaming, the entry keeps the union of
+    the paths its readers need (see _refresh_cache).
+    """
+    request = _canonical_request(endpoint)
+    digest = hashlib.md5(json.dumps(request, default=str).encode()).hexdigest()
+    return f"custom_widget:api:{digest}"
+
+
+def _make_processed_cache_key(endpoint):
+    """Build the cache key for processed results, which also depend on the mappings, display mode and row selection."""
+    config = [
+        PROCESSED_FORMAT_VERSION,
+        endpoint.display_mode,
+        endpoint.mappings,
+        endpoint.where,
+        endpoint.sort_by,
+        endpoint.sort_order,
+        endpoint.limit,
+    ]
+    digest = hashlib.md5(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{_make_cache_key(endpoint)}:processed:{digest}"
+
+
+def get_cache_key(endpoint):
+    """Return the key of the cache entry that fetch_api_data serves an endpoint's widgets from."""
+    if get_plugin_setting("cache_processed", False):
+        return _make_processed_cache_key(endpoint)
+    return _make_cache_key(endpoint)
+
+
+def make_fragment_cache_key(endpoint, result, variant=""):
+    """
+    Build the cache key for a rendered widget fragment, or None if it should not be cached.
+
+    The key covers the endpoint version (pk + last_updated, which also covers
+    mappings and display settings), the digest of the upstream response, the
+    active language and the variant (e.g. the table page and sort), so every
+    viewer of the same data shares one render. Stale results are not cached
+    because their fragment shows their age.
+    """
+    digest = result.get("digest")
+    if not digest or result.get("stale") or not endpoint.refresh_interval:
+        return None
+    version = endpoint.last_updated.timestamp() if endpoint.last_updated else ""
+    raw = f"{endpoint.pk}:{version}:{digest}:{get_language()}:{variant}"
+    return f"custom_widget:html:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _merge_paths(paths, other):
+    if paths is None or other is None:
+        return None
+    return set(paths) | set(other)
+
+
+def _paths_cover(kept, needed):
+    """Return whether a result projected to the kept paths (None for whole) holds every needed path."""
+    if kept is None:
+        return True
+    if needed is None:
+        return False
+    # Values at the end of a kept path are kept whole, so kept prefixes cover longer paths
+    return all(any(parts[: len(prefix)] == prefix for prefix in kept) for parts in needed)
+
+
+def _register_paths(cache_key, paths, ttl):
+    """Add paths a reader needs to those kept the next time the entry at cache_key is refreshed."""
+    paths_key = f"{cache_key}:paths"
+    registered = cache.get(paths_key)
+    merged = _merge_paths(paths, registered["paths"]) if registered is not None else paths
+    cache.set(paths_key, {"paths": sorted(merged) if merged is not None else None}, ttl)
+
+
+def _request_upstream(endpoint, validators=None, paths=_MISSING):
+    """
+    Perform the upstream HTTP call(s) for an endpoint and return a result dict.
+
+    Responses are projected to paths when streaming (the endpoint's own
+    projection paths by default, None keeps them whole).
+
+    Single-page results carry the response's "validators" (ETag and
+    Last-Modified). When validators from an earlier response are passed and
+    the upstream answers 304, the result is {"not_modified": True} with no data.
+    Timeouts, connection failures and 5xx responses are flagged with
+    "circuit_failure" for the circuit breaker.
+    """
+    started = time.monotonic()
+    outcome = "ok"
+    if paths is _MISSING:
+        paths = get_stream_paths(endpoint)
+    try:
+        if endpoint.pagination != "none":
+            data, digest = fetch_pages(endpoint, paths)
+            result = {"data": data, "error": None, "digest": digest}
+        else:
+            data, response, digest = fetch_page(endpoint, endpoint.url, paths, validators)
+            result = {"data": data, "error": None, "digest": digest}
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            if etag or last_modified:
+                result["validators"] = {"etag": etag, "last_modified": last_modified}
+
+    except NotModified:
+        outcome = "not_modified"
+        result = {"data": None, "error": None, "not_modified": True}
+    except ResponseTooLarge as e:
+        outcome = "too_large"
+        result = {"data": None, "error": str(e)}
+    except requests.exceptions.Timeout:
+        outcome = "timeout"
+        result = {"data": None, "error": f"Request timed out ({endpoint.timeout}s)", "circuit_failure": True}
+    except requests.exceptions.ConnectionError:
+        outcome = "connection_error"
+        result = {"data": None, "error": "Connection failed", "circuit_failure": True}
+    except requests.exceptions.HTTPError as e:
+        outcome = "http_error"
+        result = {"data": None, "error": f"HTTP {e.response.status_code}"}
+        if e.response.status_code >= 500:
+            result["circuit_failure"] = True
+    except ValueError:
+        outcome = "invalid_json"
+        result = {"data": None, "error": "Invalid JSON response"}
+    except Exception as e:
+        outcome = "error"
+        logger.warning(f"API call failed for {endpoint.name}: {e}")
+        result = {"data": None, "error": str(e)}
+
+    metrics.upstream_requests.labels(endpoint.name, outcome).inc()
+    metrics.upstream_latency.labels(endpoint.name).observe(time.monotonic() - started)
+
+    return result
+
+
+def _last_good_ttl(cache_ttl):
+    """Return how long the last good result of an entry (and its validators and paths) is kept, in seconds."""
+    return max(cache_ttl * LAST_GOOD_TTL_FACTOR, LAST_GOOD_TTL_MIN)
+
+
+def _as_stale(result):
+    """Return a cached result marked "stale", with its "age" in seconds."""
+    now = time.time()
+    return {**result, "stale": True, "age": int(now - result.get("fetched_at", now))}
+
+
+def _refresh_cache(endpoint, cache_key, cache_ttl, processed=False):
+    """
+    Fetch from upstream and store the result under cache_key.
+
+    With processed=True the mapping output replaces the raw data in the
+    stored result, so cache hits skip both unpickling the full payload and
+    re-running the mappings.
+
+    With the "conditional_requests" setting, the ETag/Last-Modified of the
+    last good response are sent along, and a 304 Not Modified reuses the
+    last good result (processed or not) instead of downloading and parsing
+    the body again.
+
+    While a circuit breaker for the endpoint or its host is open, no request
+    is made: the last good result is returned marked stale, or a fast error
+    if there is none.
+
+    Streamed responses are projected to the union of the endpoint's paths
+    and those registered under "<cache_key>:paths" by other endpoints reading
+    the same entry, and the result records the kept "paths". The result also
+    records until when it is "fresh_until", per this endpoint's
+    refresh_interval, so every reader of a shared entry agrees on its age.
+    """
+    last_key = f"{cache_key}:last"
+    validators_key = f"{cache_key}:validators"
+    paths_key = f"{cache_key}:paths"
+    conditional = get_plugin_setting("conditional_requests", True) and endpoint.pagination == "none"
+
+    retry_after, circuits = check_circuits(endpoint)
+    if retry_after is not None:
+        metrics.upstream_requests.labels(endpoint.name, "circuit_open").inc()
+        previous = cache_get(last_key)
+        if previous is not None:
+            return _as_stale(previous)
+        result = {"data": None, "error": f"Upstream unavailable, retrying in {math.ceil(retry_after)}s"}
+        cache_set(cache_key, result, min(cache_ttl, 5, math.ceil(retry_after)))
+        return result
+
+    paths = get_stream_paths(endpoint)
+    if paths is not None:
+        registered = cache.get(paths_key)
+        if registered is not None:
+            paths = _merge_paths(paths, registered["paths"])
+    if paths is not None:
+        paths = sorted(paths)
+
+    sent = cache.get(validators_key) if conditional else None
+    result = _request_upstream(endpoint, sent, paths)
+    if result.get("not_modified"):
+        result = cache_get(last_key)
+        if result is None or not _paths_cover(result.get("paths"), paths):
+            # The last good result expired before its validators, or lacks newly
+            # registered paths: fetch it again
+            result = _request_upstream(endpoint, paths=paths)
+        else:
+            result["validators"] = sent
+
+    record_circuit_result(circuits, result.pop("circuit_failure", False))
+    validators = result.pop("validators", None)
+    result["fetched_at"] = time.time()
+    result["fresh_until"] = result["fetched_at"] + cache_ttl
+    result["paths"] = paths
+    if processed and result["error"] is None and result["data"] is not None:
+        result["processed"] = process_result(endpoint, result)
+        result["data"] = None
+
+    # Cache successful responses for refresh_interval seconds, plus the
+    # stale-while-revalidate window during which they may still be served.
+    # Errors are cached for a shorter period to allow quick recovery.
+    if result["error"] is None:
+        encoded = encode_cache_value(result)
+        cache.set(cache_key, encoded, cache_ttl + (endpoint.stale_while_revalidate or 0))
+        last_ttl = _last_good_ttl(cache_ttl)
+        cache.set(last_key, encoded, last_ttl)
+        cache.set(paths_key, {"paths": paths}, last_ttl)
+        if conditional and validators:
+            cache.set(validators_key, validators, last_ttl)
+    else:
+        cache_set(cache_key, result, min(cache_ttl, 5))
+
+    return result
+
+
+def _release_lock(lock_key, token):
+    # Only release the lock if it has not expired and been taken over
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _refresh_and_release(endpoint, cache_key, cache_ttl, lock_key, token, processed=False):
+    """Refresh the cache entry for an endpoint while holding its refresh lock."""
+    try:
+        return _refresh_cache(endpoint, cache_key, cache_ttl, processed)
+    finally:
+        _release_lock(lock_key, token)
+
+
+def _background_refresh(endpoint, cache_key, cache_ttl, lock_key, token, processed=False):
+    try:
+        _refresh_and_release(endpoint, cache_key, cache_ttl, lock_key, token, processed)
+    except Exception as e:
+        logger.warning(f"Background refresh failed for {endpoint.name}: {e}")
+
+
+def _is_fresh(cached, cache_ttl, now):
+    # Shared entries carry their writer's deadline; older entries are judged by the reader's interval
+    fresh_until = cached.get("fresh_until")
+    if fresh_until is None:
+        fresh_until = cached.get("fetched_at", now) + cache_ttl
+    return now < fresh_until
+
+
+def _read_entry(cache_key, cache_ttl, needed):
+    """Return the cached result under cache_key, or None if it is missing or lacks needed paths."""
+    cached = cache_get(cache_key)
+    if cached is not None and needed is not _MISSING and not _paths_cover(cached.get("paths"), needed):
+        # Written for endpoints that need other fields: refresh it with ours added
+        _register_paths(cache_key, needed, _last_good_ttl(cache_ttl))
+        return None
+    return cached
+
+
+def _fetch_uncached(endpoint):
+    """Fetch an endpoint that is not cached (refresh_interval 0), still through its circuit breakers."""
+    retry_after, circuits = check_circuits(endpoint)
+    if retry_after is not None:
+        metrics.upstream_requests.labels(endpoint.name, "circuit_open").inc()
+        return {"data": None, "error": f"Upstream unavailable, retrying in {math.ceil(retry_after)}s"}
+
+    result = _request_upstream(endpoint)
+    record_circuit_result(circuits, result.pop("circuit_failure", False))
+    result.pop("validators", None)
+    return result
+
+
+def _read_scheduled(endpoint, cache_key, cache_ttl, needed=_MISSING):
+    """
+    Return an endpoint's cached result without ever calling the upstream.
+
+    If the entry lacks needed paths, they are registered for the next
+    scheduled refresh and the entry is served as it is meanwhile.
+    """
+    cached = cache_get(cache_key)
+    if cached is not None:
+        if needed is not _MISSING and not _paths_cover(cached.get("paths"), needed):
+            _register_paths(cache_key, needed, _last_good_ttl(cache_ttl))
+        if _is_fresh(cached, cache_ttl, time.time()):
+            metrics.cache_requests.labels(endpoint.name, "hit").inc()
+            return cached
+        metrics.cache_requests.labels(endpoint.name, "stale").inc()
+        return _as_stale(cached)
+
+    metrics.cache_requests.labels(endpoint.name, "miss").inc()
+    previous = cache_get(f"{cache_key}:last")
+    if previous is not None:
+        return _as_stale(previous)
+    return {"data": None, "error": "Waiting for scheduled refresh"}
+
+
+def refresh_endpoint(endpoint):
+    """
+    Refresh the cached result that fetch_api_data serves for an endpoint, fresh or not.
+
+    Used by the background scheduler. Takes the same single-flight lock as
+    fetch_api_data and returns None without fetching when another worker
+    already holds it; otherwise returns the new result.
+    """
+    cache_ttl = endpoint.refresh_interval or 0
+    if cache_ttl <= 0:
+        return None
+
+    processed = get_plugin_setting("cache_processed", False)
+    cache_key = get_cache_key(endpoint)
+    lock_key = f"{cache_key}:lock"
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, fetch_budget(endpoint) + 5):
+        return None
+    return _refresh_and_release(endpoint, cache_key, cache_ttl, lock_key, token, processed)
+
+
+def fetch_api_data(endpoint, raw=False):
+    """
+    Make an HTTP request to the configured API endpoint.
+
+    Results are cached in Redis for the endpoint's refresh_interval so that
+    multiple browser tabs / users share a single upstream call per cycle.
+
+    Refreshes are single-flight: when the cache entry is missing, only the
+    caller that wins a cache.add() lock queries the upstream. Other callers
+    get the last successful result right away (marked "stale"); only when
+    there is none do they poll the cache for up to the "single_flight_wait"
+    plugin setting, then return an error.
+
+    If the endpoint has a stale_while_revalidate window, a result older than
+    refresh_interval but still inside the window is returned immediately
+    (marked with "stale" and its "age" in seconds) while a background thread
+    refreshes the cache.
+
+    With the "background_scheduler" plugin setting, the scheduler (see
+    scheduler.RefreshScheduler) keeps the cache warm and this function only
+    reads from it: stale results are served without a refresh and misses
+    return the last good result, or an error if there is none yet.
+
+    When the "cache_processed" plugin setting is enabled, the cache holds the
+    output of the mapping step (under "processed", see process_result) instead
+    of the raw response, keyed by a hash of the mappings. Pass raw=True to get
+    (and separately cache) the raw payload.
+
+    Args:
+        endpoint: CustomAPIEndpoint model instance
+        raw: Always return the raw parsed JSON under "data"
+
+    Returns:
+        dict with keys: data (parsed JSON), error (str or None), and
+        fetched_at (epoch seconds) for results that went through the cache
+    """
+    cache_ttl = endpoint.refresh_interval or 0
+    if cache_ttl <= 0:
+        return _fetch_uncached(endpoint)
+
+    cache_processed = get_plugin_setting("cache_processed", False)
+    processed = not raw and cache_processed
+    cache_key = _make_processed_cache_key(endpoint) if processed else _make_cache_key(endpoint)
+    # Processed entries are never shared between mapping configurations, so only raw ones need the check
+    needed = _MISSING if processed else get_stream_paths(endpoint)
+    # The scheduler keeps the same entries warm that widgets read, i.e. not raw ones when caching processed
+    if get_plugin_setting("background_scheduler", False) and processed == cache_processed:
+        return _read_scheduled(endpoint, cache_key, cache_ttl, needed)
+
+    lock_key = f"{cache_key}:lock"
+    lock_ttl = fetch_budget(endpoint) + 5
+    deadline = time.monotonic() + get_plugin_setting("single_flight_wait", 5)
+    previous = None
+
+    while True:
+        cached = _read_entry(cache_key, cache_ttl, needed)
+        if cached is not None:
+            if _is_fresh(cached, cache_ttl, time.time()):
+                metrics.cache_requests.labels(endpoint.name, "hit").inc()
+                return cached
+
+            # Inside the stale-while-revalidate window: serve now, refresh behind
+            token = uuid.uuid4().hex
+            if cache.add(lock_key, token, lock_ttl):
+                get_executor("refresh", "background_refresh_workers", 4).submit(
+                    _background_refresh, endpoint, cache_key, cache_ttl, lock_key, token, processed
+                )
+            metrics.cache_requests.labels(endpoint.name, "stale").inc()
+            return _as_stale(cached)
+
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, lock_ttl):
+            # The previous lock holder may have stored a result since the read above
+            cached = _read_entry(cache_key, cache_ttl, needed)
+            if cached is not None and _is_fresh(cached, cache_ttl, time.time()):
+                _release_lock(lock_key, token)
+                metrics.cache_requests.labels(endpoint.name, "hit").inc()
+                return cached
+            metrics.cache_requests.labels(endpoint.name, "miss").inc()
+            return _refresh_and_release(endpoint, cache_key, cache_ttl, lock_key, token, processed)
+
+        # Another worker is refreshing: only wait for it when there is no last good result to serve
+        previous = cache_get(f"{cache_key}:last")
+        if previous is not None or time.monotonic() >= deadline:
+            break
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+
+    metrics.cache_requests.labels(endpoint.name, "fallback").inc()
+    if previous is not None:
+        return _as_stale(previous)
+    return {"data": None, "error": "Waiting for upstream response"}
@@ -5,7 +5,14 @@ from netbox.forms import NetBoxModelBulkEditForm, NetBoxModelFilterSetForm, NetB
 from utilities.forms.fields import CommentField, TagFilterField
 from utilities.forms.rendering import FieldSet
 
-from .models import BookmarkLink, CustomAPIEndpoint, DisplayModeChoices, HTTPMethodChoices
+from .models import (
+    BookmarkLink,
+    CustomAPIEndpoint,
+    DisplayModeChoices,
+    HTTPMethodChoices,
+    PaginationChoices,
+    SortOrderChoices,
+)
 
 
 class CustomAPIEndpointForm(NetBoxModelForm):
@@ -16,7 +23,9 @@ class CustomAPIEndpointForm(NetBoxModelForm):
     fieldsets = (
         FieldSet("name", "description", name="General"),
         FieldSet("url", "http_method", "headers", "body", "verify_ssl", "timeout", name="API Configuration"),
-        FieldSet("mappings", "display_mode", "refresh_interval", "link", name="Display"),
+        FieldSet("pagination", "results_field", "page_size", "max_pages", name="Pagination"),
+        FieldSet("mappings", "display_mode", "refresh_interval", "stale_while_revalidate", "link", name="Display"),
+        FieldSet("where", "sort_by", "sort_order", "limit", name="Table Rows"),
         FieldSet("comments", "tags", name="Details"),
     )
 
@@ -28,9 +37,18 @@ class CustomAPIEndpointForm(NetBoxModelForm):
             "http_method",
             "headers",
             "body",
+            "pagination",
+            "results_field",
+            "page_size",
+            "max_pages",
             "mappings",
             "display_mode",
             "refresh_interval",
+            "stale_while_revalidate",
+            "where",
+            "sort_by",
+            "sort_order",
+            "limit",
             "link",
             "verify_ssl",
             "timeout",
@@ -65,9 +83,18 @@ class CustomAPIEndpointImportForm(NetBoxModelImportForm):
             "http_method",
             "headers",
             "body",
+            "pagination",
+            "results_field",
+            "page_size",
+            "max_pages",
             "mappings",
             "display_mode",
             "refresh_interval",
+            "stale_while_revalidate",
+            "where",
+            "sort_by",
+            "sort_order",
+            "limit",
             "link",
             "verify_ssl",
             "timeout",
@@ -83,14 +110,20 @@ class CustomAPIEndpointBulkEditForm(NetBoxModelBulkEditForm):
     model = CustomAPIEndpoint
 
     http_method = forms.ChoiceField(choices=HTTPMethodChoices, required=False)
+    pagination = forms.ChoiceField(choices=PaginationChoices, required=False)
+    max_pages = forms.IntegerField(required=False)
     display_mode = forms.ChoiceField(choices=DisplayModeChoices, required=False)
     refresh_interval = forms.IntegerField(required=False)
+    stale_while_revalidate = forms.IntegerField(required=False)
+    sort_by = forms.CharField(max_length=200, required=False)
+    sort_order = forms.ChoiceField(choices=SortOrderChoices, required=False)
+    limit = forms.IntegerField(required=False)
     verify_ssl = forms.NullBooleanField(required=False)
     timeout = forms.IntegerField(required=False)
     description = forms.CharField(max_length=200, required=False)
     comments = CommentField()
 
-    nullable_fields = ["description", "comments", "body"]
+    nullable_fields = ["description", "comments", "body", "sort_by"]
 
 
 #
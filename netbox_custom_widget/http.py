@@ -0,0 +1,204 @@
+"""Pooled HTTP sessions and single upstream requests."""
+
+import hashlib
+import json
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metrics
+from .projection import project_json
+from .utils import get_plugin_setting
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class ResponseTooLarge(Exception):
+    """Raised when an upstream response exceeds the "max_response_size" setting."""
+
+    def __init__(self, max_size):
+        super().__init__(f"Response exceeds {max_size:,} bytes")
+
+
+class _BodyReader:
+    """
+    File-like reader over a streamed response body.
+
+    Hashes the body as it is read and enforces the maximum response size
+    without holding more than one chunk in memory.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, response, max_size=0):
+        self._chunks = response.iter_content(chunk_size=self.chunk_size)
+        self._buffer = b""
+        self._md5 = hashlib.md5()
+        self.max_size = max_size
+        self.size = 0
+
+    def _next_chunk(self):
+        for chunk in self._chunks:
+            if chunk:
+                self.size += len(chunk)
+                if self.max_size and self.size > self.max_size:
+                    raise ResponseTooLarge(self.max_size)
+                self._md5.update(chunk)
+                return chunk
+        return b""
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = [self._buffer]
+            self._buffer = b""
+            while chunk := self._next_chunk():
+                parts.append(chunk)
+            return b"".join(parts)
+
+        if not self._buffer:
+            self._buffer = self._next_chunk()
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def hexdigest(self):
+        return self._md5.hexdigest()
+
+
+# Pooled keep-alive sessions: (scheme, netloc, verify_ssl) -> [session, last_used]
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session():
+    """Create a keep-alive session configured from the plugin settings."""
+    retries = Retry(
+        total=get_plugin_setting("http_retries", 1),
+        read=False,
+        status=False,
+        backoff_factor=0.2,
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=get_plugin_setting("http_pool_size", 10), max_retries=retries
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Sessions are shared by every endpoint on a host, so never replay cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(url, verify_ssl):
+    """
+    Return the pooled session for a URL's scheme/host and SSL verification setting.
+
+    Sessions keep connections (and TLS sessions) alive between calls so
+    endpoints on the same host stop reconnecting on every cache miss.
+    Sessions idle for longer than the "http_idle_timeout" setting are closed.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme.lower(), parts.netloc.lower(), bool(verify_ssl))
+    now = time.monotonic()
+    idle_timeout = get_plugin_setting("http_idle_timeout", 300)
+
+    with _sessions_lock:
+        for other_key, (session, last_used) in list(_sessions.items()):
+            if other_key != key and now - last_used > idle_timeout:
+                del _sessions[other_key]
+                session.close()
+
+        entry = _sessions.get(key)
+        if entry is None or now - entry[1] > idle_timeout:
+            if entry is not None:
+                entry[0].close()
+            entry = _sessions[key] = [_build_session(), now]
+        else:
+            entry[1] = now
+        return entry[0]
+
+
+class NotModified(Exception):
+    """Raised when a conditional upstream request is answered with 304 Not Modified."""
+
+
+def fetch_page(endpoint, url, paths, validators=None):
+    """
+    Fetch and parse one upstream response.
+
+    validators are the "etag" and "last_modified" of a previous response;
+    they are sent as If-None-Match / If-Modified-Since, and NotModified is
+    raised without reading a body if the upstream answers 304.
+
+    Returns:
+        Tuple of (data, response, digest) where response is the closed
+        response (for its headers and Link relations) and digest is the MD5
+        of the response body
+    """
+    kwargs = {
+        "headers": dict(endpoint.headers or {}),
+        "timeout": endpoint.timeout or 30,
+        "verify": endpoint.verify_ssl,
+    }
+
+    if endpoint.http_method == "POST" and endpoint.body:
+        kwargs["data"] = endpoint.body
+        if "Content-Type" not in kwargs["headers"]:
+            kwargs["headers"]["Content-Type"] = "application/json"
+
+    if validators:
+        if validators.get("etag"):
+            kwargs["headers"]["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            kwargs["headers"]["If-Modified-Since"] = validators["last_modified"]
+
+    body = None
+    session = get_session(url, endpoint.verify_ssl)
+    try:
+        with session.request(method=endpoint.http_method, url=url, stream=True, **kwargs) as response:
+            if response.status_code == 304:
+                raise NotModified()
+            response.raise_for_status()
+
+            max_size = get_plugin_setting("max_response_size", 0)
+            content_length = response.headers.get("Content-Length", "")
+            if max_size and content_length.isdigit() and int(content_length) > max_size:
+                raise ResponseTooLarge(max_size)
+
+            body = _BodyReader(response, max_size)
+            if paths:
+                try:
+                    data = project_json(ijson.parse(body, use_float=True), paths)
+                except ijson.JSONError as e:
+                    # Report malformed bodies like json.loads does
+                    raise ValueError(str(e)) from e
+            else:
+                data = json.loads(body.read())
+            return data, response, body.hexdigest()
+    finally:
+        if body is not None:
+            metrics.upstream_response_bytes.labels(endpoint.name).observe(body.size)
+
+
+def fetch_budget(endpoint):
+    """
+    Return the longest a complete fetch of an endpoint may take, in seconds.
+
+    Paginated endpoints may make up to max_pages requests, each bounded by
+    the endpoint's timeout (following "next" links one at a time is the
+    worst case).
+    """
+    timeout = endpoint.timeout or 30
+    if endpoint.pagination != "none":
+        return timeout * max(endpoint.max_pages or 1, 1)
+    return timeout
@@ -0,0 +1,38 @@
+"""Management command running the background refresh scheduler."""
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ...scheduler import RefreshScheduler
+
+
+class Command(BaseCommand):
+    help = "Refresh the cached results of widget endpoints in the background, before they expire"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Maximum number of concurrent refreshes (defaults to the scheduler_workers setting)",
+        )
+        parser.add_argument("--once", action="store_true", help="Refresh every endpoint once and exit")
+
+    def handle(self, *args, **options):
+        scheduler = RefreshScheduler(workers=options["workers"])
+        if options["once"]:
+            count = scheduler.refresh_all()
+            if count is None:
+                self.stdout.write("Another node holds the scheduler lease, nothing refreshed")
+            else:
+                self.stdout.write(f"Refreshed {count} endpoint result(s)")
+            return
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+
+        self.stdout.write(f"Refresh scheduler {scheduler.lease.owner} running with {scheduler.workers} worker(s)")
+        scheduler.run(stop)
+        self.stdout.write("Refresh scheduler stopped")
@@ -0,0 +1,65 @@
+"""Prometheus metrics for NetBox Custom Widget plugin."""
+
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+upstream_requests = Counter(
+    "custom_widget_upstream_requests_total",
+    "Upstream API requests by endpoint and outcome",
+    ["endpoint", "outcome"],
+)
+upstream_latency = Histogram(
+    "custom_widget_upstream_latency_seconds",
+    "Upstream API request duration, including reading and parsing the body",
+    ["endpoint"],
+)
+upstream_response_bytes = Histogram(
+    "custom_widget_upstream_response_bytes",
+    "Size of upstream API response bodies",
+    ["endpoint"],
+    buckets=SIZE_BUCKETS,
+)
+cache_requests = Counter(
+    "custom_widget_cache_requests_total",
+    "Fetch cache lookups by endpoint and result (hit, miss, stale, fallback)",
+    ["endpoint", "result"],
+)
+cache_codec_bytes = Counter(
+    "custom_widget_cache_codec_bytes_total",
+    "Bytes passed through the cache codec, before (raw) and after (stored) compression",
+    ["kind"],
+)
+mapping_duration = Histogram(
+    "custom_widget_mapping_seconds",
+    "Time spent applying field mappings to a response",
+    ["endpoint"],
+)
+render_duration = Histogram(
+    "custom_widget_render_seconds",
+    "Time spent rendering a widget content fragment",
+    ["endpoint"],
+)
+scheduler_lag = Histogram(
+    "custom_widget_scheduler_lag_seconds",
+    "Delay between when a scheduled refresh was due and when it started",
+    ["endpoint"],
+)
+
+
+def generate_metrics():
+    """
+    Return (body, content type) of the metrics in Prometheus text format.
+
+    Uses the multiprocess collector when prometheus_client runs in
+    multiprocess mode (PROMETHEUS_MULTIPROC_DIR set), as under gunicorn.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("netbox_custom_widget", "0004_bookmarklink"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="stale_while_revalidate",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Seconds past the refresh interval during which the last result is shown "
+                "while it is refreshed in the background (0 to disable)",
+            ),
+        ),
+    ]
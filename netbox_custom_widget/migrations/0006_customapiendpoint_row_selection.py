@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("netbox_custom_widget", "0005_customapiendpoint_stale_while_revalidate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="where",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Table mode: conditions array rows must match, as JSON "
+                '(e.g., [{"field": "status", "op": "eq", "value": "up"}])',
+            ),
+        ),
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="sort_by",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Table mode: dot-notation field within each array row to sort by",
+                max_length=200,
+            ),
+        ),
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="sort_order",
+            field=models.CharField(default="asc", max_length=4),
+        ),
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="limit",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Table mode: maximum number of array rows to show (0 for all)",
+            ),
+        ),
+    ]
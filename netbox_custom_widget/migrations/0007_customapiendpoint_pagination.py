@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("netbox_custom_widget", "0006_customapiendpoint_row_selection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="pagination",
+            field=models.CharField(
+                default="none",
+                help_text="Follow paginated responses and merge every page's results into one array",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="results_field",
+            field=models.CharField(
+                blank=True,
+                default="results",
+                help_text="Dot-notation path to the results array in each page (pages that are arrays are used as-is)",
+                max_length=200,
+            ),
+        ),
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="page_size",
+            field=models.PositiveIntegerField(
+                default=100,
+                help_text="Offset/limit pagination: number of results requested per page",
+            ),
+        ),
+        migrations.AddField(
+            model_name="customapiendpoint",
+            name="max_pages",
+            field=models.PositiveIntegerField(
+                default=10,
+                help_text="Maximum number of pages fetched per refresh",
+            ),
+        ),
+    ]
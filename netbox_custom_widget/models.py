@@ -1,5 +1,6 @@
 """Models for NetBox Custom Widget plugin."""
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.urls import reverse
 from netbox.models import NetBoxModel
@@ -38,6 +39,38 @@ class DisplayModeChoices(ChoiceSet):
     ]
 
 
+class PaginationChoices(ChoiceSet):
+    """Upstream pagination styles that can be followed."""
+
+    key = "CustomAPIEndpoint.pagination"
+
+    PAGINATION_NONE = "none"
+    PAGINATION_NEXT = "next"
+    PAGINATION_LINK = "link"
+    PAGINATION_OFFSET = "offset"
+
+    CHOICES = [
+        (PAGINATION_NONE, "None", "gray"),
+        (PAGINATION_NEXT, "Next URL in body", "blue"),
+        (PAGINATION_LINK, "Link header", "green"),
+        (PAGINATION_OFFSET, "Offset/limit", "purple"),
+    ]
+
+
+class SortOrderChoices(ChoiceSet):
+    """Sort order choices for array responses."""
+
+    key = "CustomAPIEndpoint.sort_order"
+
+    ORDER_ASC = "asc"
+    ORDER_DESC = "desc"
+
+    CHOICES = [
+        (ORDER_ASC, "Ascending", "blue"),
+        (ORDER_DESC, "Descending", "purple"),
+    ]
+
+
 class CustomAPIEndpoint(NetBoxModel):
     """
     Stores configuration for an external API endpoint.
@@ -69,6 +102,26 @@ class CustomAPIEndpoint(NetBoxModel):
         blank=True,
         help_text="Request body for POST requests",
     )
+    pagination = models.CharField(
+        max_length=10,
+        choices=PaginationChoices,
+        default=PaginationChoices.PAGINATION_NONE,
+        help_text="Follow paginated responses and merge every page's results into one array",
+    )
+    results_field = models.CharField(
+        max_length=200,
+        default="results",
+        blank=True,
+        help_text="Dot-notation path to the results array in each page (pages that are arrays are used as-is)",
+    )
+    page_size = models.PositiveIntegerField(
+        default=100,
+        help_text="Offset/limit pagination: number of results requested per page",
+    )
+    max_pages = models.PositiveIntegerField(
+        default=10,
+        help_text="Maximum number of pages fetched per refresh",
+    )
     mappings = models.JSONField(
         default=list,
         blank=True,
@@ -83,6 +136,32 @@ class CustomAPIEndpoint(NetBoxModel):
         default=30,
         help_text="Auto-refresh interval in seconds (0 to disable)",
     )
+    stale_while_revalidate = models.PositiveIntegerField(
+        default=0,
+        help_text="Seconds past the refresh interval during which the last result is shown "
+        "while it is refreshed in the background (0 to disable)",
+    )
+    where = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Table mode: conditions array rows must match, as JSON "
+        '(e.g., [{"field": "status", "op": "eq", "value": "up"}])',
+    )
+    sort_by = models.CharField(
+        max_length=200,
+        blank=True,
+        default="",
+        help_text="Table mode: dot-notation field within each array row to sort by",
+    )
+    sort_order = models.CharField(
+        max_length=4,
+        choices=SortOrderChoices,
+        default=SortOrderChoices.ORDER_ASC,
+    )
+    limit = models.PositiveIntegerField(
+        default=0,
+        help_text="Table mode: maximum number of array rows to show (0 for all)",
+    )
     verify_ssl = models.BooleanField(
         default=True,
         help_text="Verify SSL certificates",
@@ -114,6 +193,15 @@ class CustomAPIEndpoint(NetBoxModel):
     def get_absolute_url(self):
         return reverse("plugins:netbox_custom_widget:customapiendpoint", args=[self.pk])
 
+    def clean(self):
+        super().clean()
+        from .utils import compile_row_filter
+
+        try:
+            compile_row_filter(self.where)
+        except ValueError as e:
+            raise ValidationError({"where": str(e)})
+
 
 class BookmarkLink(NetBoxModel):
     """
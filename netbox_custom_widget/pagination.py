@@ -0,0 +1,108 @@
+"""Following upstream pagination and merging the pages of a response."""
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from .http import fetch_page
+from .utils import extract_field, get_executor
+
+
+def _with_query(url, **params):
+    """Return url with the given query parameters set, keeping all others."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in params]
+    query.extend((k, str(v)) for k, v in params.items())
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _query_int(url, name):
+    value = dict(parse_qsl(urlsplit(url).query)).get(name, "")
+    return int(value) if value.isdigit() else None
+
+
+def _page_items(page, results_field):
+    """Return the results array of one page (the page itself if it is an array)."""
+    if isinstance(page, list):
+        return page
+    items = extract_field(page, results_field or "results")
+    return items if isinstance(items, list) else []
+
+
+def _next_page_url(endpoint, url, page, links):
+    """Return the URL of the page after the one fetched from url, or None on the last page."""
+    if endpoint.pagination == "link":
+        return links.get("next", {}).get("url")
+    if endpoint.pagination == "next":
+        next_url = page.get("next") if isinstance(page, dict) else None
+        return urljoin(url, next_url) if isinstance(next_url, str) and next_url else None
+    # Offset: a short page is the last one
+    limit = endpoint.page_size or 100
+    if len(_page_items(page, endpoint.results_field)) < limit:
+        return None
+    return _with_query(url, offset=(_query_int(url, "offset") or 0) + limit)
+
+
+def _remaining_page_urls(endpoint, url, page, links):
+    """
+    Return the URLs of every page after the first when they can be derived up front, else None.
+
+    Offset pagination (also when a "next" URL carries offset/limit, as in
+    NetBox and DRF) needs the total "count" of the first page. Link header
+    pagination needs numbered "next" and "last" pages.
+    """
+    max_pages = max(endpoint.max_pages or 1, 1)
+    next_url = _next_page_url(endpoint, url, page, links)
+    if next_url is None:
+        return []
+
+    if endpoint.pagination == "link":
+        last_url = links.get("last", {}).get("url")
+        first, last = _query_int(next_url, "page"), _query_int(last_url or "", "page")
+        if first is None or last is None or _with_query(last_url, page=first) != _with_query(next_url, page=first):
+            return None
+        return [_with_query(next_url, page=n) for n in range(first, last + 1)][: max_pages - 1]
+
+    count = page.get("count") if isinstance(page, dict) else None
+    offset, limit = _query_int(next_url, "offset"), _query_int(next_url, "limit")
+    if not isinstance(count, int) or offset is None or not limit:
+        return None
+    return [_with_query(next_url, offset=o) for o in range(offset, count, limit)][: max_pages - 1]
+
+
+def fetch_pages(endpoint, paths):
+    """
+    Fetch every page of a paginated endpoint (up to max_pages) and merge their results.
+
+    After the first page, pages whose URLs can be derived (known offsets or
+    page numbers) are fetched concurrently; otherwise "next" links are
+    followed one at a time.
+
+    Returns:
+        Tuple of (items, digest) with the merged results array and a digest
+        covering every page
+    """
+    max_pages = max(endpoint.max_pages or 1, 1)
+    url = endpoint.url
+    if endpoint.pagination == "offset":
+        url = _with_query(url, offset=0, limit=endpoint.page_size or 100)
+
+    page, response, digest = fetch_page(endpoint, url, paths)
+    pages, digests = [page], [digest]
+
+    urls = _remaining_page_urls(endpoint, url, page, response.links) if max_pages > 1 else []
+    if urls is not None:
+        for page, _, digest in get_executor("page", "page_fetch_workers", 8).map(
+            lambda u: fetch_page(endpoint, u, paths), urls
+        ):
+            pages.append(page)
+            digests.append(digest)
+    else:
+        next_url = _next_page_url(endpoint, url, page, response.links)
+        while next_url and len(pages) < max_pages:
+            page, response, digest = fetch_page(endpoint, next_url, paths)
+            pages.append(page)
+            digests.append(digest)
+            next_url = _next_page_url(endpoint, next_url, page, response.links)
+
+    items = [item for page in pages for item in _page_items(page, endpoint.results_field)]
+    return items, hashlib.md5(":".join(digests).encode()).hexdigest()
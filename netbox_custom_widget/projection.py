@@ -0,0 +1,148 @@
+"""Projection of streamed JSON responses down to the paths an endpoint renders."""
+
+from .utils import get_mapping_plan, get_plugin_setting, split_field_path
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Pattern state meaning "keep the whole subtree"
+_KEEP_ALL = "*all*"
+
+
+def _part_matches(part, name, in_list):
+    if part == "*":
+        return True
+    if not in_list:
+        return part == name
+    try:
+        index = int(part)
+    except ValueError:
+        return False
+    # Negative indexes count from an end that is not known yet while streaming
+    return index == name or index < 0
+
+
+def _descend(states, name, in_list):
+    """Return the pattern states for a child, _KEEP_ALL, or None if it is not referenced."""
+    if states is _KEEP_ALL:
+        return _KEEP_ALL
+    child = set()
+    for rest in states:
+        if _part_matches(rest[0], name, in_list):
+            if len(rest) == 1:
+                return _KEEP_ALL
+            child.add(rest[1:])
+    return frozenset(child) if child else None
+
+
+def _attach(parent, name, value):
+    container = parent[0]
+    if parent[2]:
+        # Pad skipped list items so indexes of the kept items are preserved
+        container.extend([None] * (name - len(container)))
+        container.append(value)
+    else:
+        container[name] = value
+
+
+def project_json(events, paths):
+    """
+    Build a JSON document from ijson parse events keeping only the given paths.
+
+    Paths are tuples of dot-path parts as used by extract_field, where "*"
+    matches every item of an array. Containers on the way to a referenced
+    path are kept with only the referenced members, and the value at the end
+    of a path is kept whole, so extract_field returns the same results on the
+    projection as on the full document.
+    """
+    root_states = frozenset(paths)
+    # Frames: [container, states, is_list, next_index, current_key]
+    stack = []
+
+    for _, event, value in events:
+        if event == "map_key":
+            stack[-1][4] = value
+            continue
+
+        if event in ("end_map", "end_array"):
+            frame = stack.pop()
+            if not stack:
+                return frame[0]
+            continue
+
+        if stack:
+            parent = stack[-1]
+            in_list = parent[2]
+            name = parent[3] if in_list else parent[4]
+            if in_list:
+                parent[3] += 1
+            states = _descend(parent[1], name, in_list) if parent[1] is not None else None
+        else:
+            parent = None
+            states = root_states
+
+        if event in ("start_map", "start_array"):
+            is_list = event == "start_array"
+            container = None
+            if states is not None:
+                container = [] if is_list else {}
+                if parent is not None:
+                    _attach(parent, name, container)
+            stack.append([container, states, is_list, 0, None])
+        elif parent is None:
+            return value
+        elif states is not None:
+            _attach(parent, name, value)
+
+    return None
+
+
+def get_projection_paths(endpoint):
+    """
+    Return the set of path tuples an endpoint's rendering can reference, or None for all.
+
+    Table endpoints apply their mappings (and their sort and filter fields)
+    to each item of an array response, so those paths are also included under
+    a "*" array wildcard.
+    """
+    plan = get_mapping_plan(endpoint)
+    if not plan.paths:
+        return None
+    paths = set(plan.paths)
+    if endpoint.display_mode == "table":
+        item_paths = set(plan.paths)
+        if plan.selection is not None:
+            item_paths.update(plan.selection.paths)
+        paths.update(("*",) + parts for parts in item_paths)
+    return paths
+
+
+def get_page_projection_paths(endpoint):
+    """
+    Return the projection paths for one page of a paginated endpoint, or None for all.
+
+    Item paths apply to the results array of each page (or to the page itself
+    when it is an array), and the "count" and "next" members drive the
+    pagination.
+    """
+    paths = get_projection_paths(endpoint)
+    if paths is None or endpoint.display_mode != "table":
+        return None
+    item_paths = [parts[1:] for parts in paths if parts[:1] == ("*",)]
+    results = split_field_path(endpoint.results_field or "results")
+    page_paths = {("count",), ("next",)}
+    page_paths.update(("*",) + parts for parts in item_paths)
+    page_paths.update(results + ("*",) + parts for parts in item_paths)
+    return page_paths
+
+
+def get_stream_paths(endpoint):
+    """Return the paths kept when streaming an endpoint's responses, or None when they are kept whole."""
+    if ijson is None or not get_plugin_setting("stream_json"):
+        return None
+    if endpoint.pagination != "none":
+        return get_page_projection_paths(endpoint)
+    return get_projection_paths(endpoint)
@@ -0,0 +1,253 @@
+"""Background scheduler that refreshes endpoint results before they expire from the cache."""
+
+import heapq
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from . import metrics
+from .endpoint_cache import get_config_version
+from .fetch import get_cache_key, refresh_endpoint
+from .models import CustomAPIEndpoint
+from .utils import get_plugin_setting
+
+logger = logging.getLogger(__name__)
+
+# Longest the scheduler sleeps between checks for due refreshes and configuration changes
+POLL_INTERVAL = 1.0
+
+# Seconds between full reloads of the endpoint list, on top of the reloads triggered by edits
+CONFIG_RELOAD_INTERVAL = 60
+
+# Seconds before a refresh that failed (or was served from the last good result) is retried
+ERROR_RETRY_INTERVAL = 5
+
+# Name of the lease held by the node running the scheduler
+SCHEDULER_LEASE = "scheduler"
+
+
+class Lease:
+    """
+    A named lease in the shared Django cache, held by at most one owner at a time.
+
+    The holder renews it (heartbeats) before its TTL runs out. If the holder
+    dies, the lease expires and another node can acquire it.
+    """
+
+    def __init__(self, name, ttl, owner=None):
+        self.key = f"custom_widget:lease:{name}"
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self):
+        """Take the lease if it is free or renew it if already held; return whether it is held."""
+        if cache.add(self.key, self.owner, self.ttl):
+            return True
+        return self.renew()
+
+    def renew(self):
+        """
+        Extend the lease by its TTL; return False if it expired or is held by another owner.
+
+        The cache has no compare-and-set, so ownership is checked again after
+        the touch. If the lease changed hands in between, the touch extended
+        the new holder's lease, which is harmless, and this owner steps down.
+        """
+        if cache.get(self.key) != self.owner or not cache.touch(self.key, self.ttl):
+            return False
+        return cache.get(self.key) == self.owner
+
+    def release(self):
+        if cache.get(self.key) == self.owner:
+            cache.delete(self.key)
+
+
+class RefreshScheduler:
+    """
+    Keep the cached result of every endpoint with a refresh_interval warm.
+
+    Endpoints are grouped by cache key, so endpoints making the same request
+    are refreshed once, at the shortest refresh_interval in the group. Groups
+    sit in a heap ordered by when they are next due: each is refreshed
+    "scheduler_lead_time" seconds, plus a random jitter of up to
+    "scheduler_jitter" seconds, before its cached result expires, and at most
+    "scheduler_workers" refreshes run at once. The endpoint list is reloaded
+    whenever an endpoint is saved or deleted.
+
+    Refreshes go through fetch.refresh_endpoint, so they share the
+    single-flight locks, conditional requests and circuit breakers of
+    regular fetches.
+
+    When the scheduler runs on several nodes, only the one holding the
+    scheduler lease refreshes endpoints. It renews the lease every third of
+    "scheduler_lease_ttl" seconds. The others stand by and take over once the
+    lease is released on shutdown or expires because its holder died.
+    """
+
+    def __init__(self, workers=None, lead_time=None, jitter=None):
+        self.workers = workers or get_plugin_setting("scheduler_workers", 4)
+        self.lead_time = get_plugin_setting("scheduler_lead_time", 2) if lead_time is None else lead_time
+        self.jitter = get_plugin_setting("scheduler_jitter", 1) if jitter is None else jitter
+        # cache key -> endpoint refreshed for it
+        self.groups = {}
+        self._heap = []
+        # cache key -> due time of its live heap entry; other entries for the key are skipped
+        self._due = {}
+        self._running = set()
+        self._done = queue.SimpleQueue()
+        self._version = None
+        self._loaded_at = float("-inf")
+        self.lease = Lease(SCHEDULER_LEASE, get_plugin_setting("scheduler_lease_ttl", 15))
+        self.leader = False
+        self._elected_at = float("-inf")
+
+    def load(self):
+        """Reload the endpoints and schedule every cache key not seen before for an immediate refresh."""
+        close_old_connections()
+        groups = {}
+        for endpoint in CustomAPIEndpoint.objects.filter(refresh_interval__gt=0):
+            key = get_cache_key(endpoint)
+            current = groups.get(key)
+            if current is None or endpoint.refresh_interval < current.refresh_interval:
+                groups[key] = endpoint
+        self.groups = groups
+
+        now = time.monotonic()
+        for key in list(self._due):
+            if key not in groups:
+                del self._due[key]
+        for key in groups:
+            if key not in self._due and key not in self._running:
+                self._schedule(key, now + random.uniform(0, self.jitter))
+
+    def sync(self, now):
+        """Reload the endpoints if one changed or the reload interval has passed."""
+        version = get_config_version()
+        if version != self._version or now - self._loaded_at >= CONFIG_RELOAD_INTERVAL:
+            self.load()
+            self._version = version
+            self._loaded_at = now
+
+    def elect(self, now):
+        """Acquire or renew the scheduler lease when due and return whether this node leads."""
+        if now - self._elected_at < self.lease.ttl / 3:
+            return self.leader
+
+        leader = self.lease.acquire()
+        self._elected_at = now
+        if leader != self.leader:
+            self.leader = leader
+            if leader:
+                logger.info(f"Refresh scheduler {self.lease.owner} acquired the scheduler lease")
+            else:
+                logger.warning(f"Refresh scheduler {self.lease.owner} lost the scheduler lease")
+                self._reset()
+        return leader
+
+    def _reset(self):
+        # Forget the schedule; it is rebuilt from scratch if the lease is regained
+        self.groups = {}
+        self._heap = []
+        self._due = {}
+        self._version = None
+        self._loaded_at = float("-inf")
+
+    def _schedule(self, key, due):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, key))
+
+    def _next_delay(self, endpoint, result):
+        interval = endpoint.refresh_interval
+        if result is not None and (result.get("error") or result.get("stale")):
+            return min(interval, ERROR_RETRY_INTERVAL)
+        early = self.lead_time + random.uniform(0, self.jitter)
+        return max(interval - early, interval / 2)
+
+    def _refresh(self, key, endpoint):
+        try:
+            result = refresh_endpoint(endpoint)
+        except Exception as e:
+            logger.warning(f"Scheduled refresh failed for {endpoint.name}: {e}")
+            result = {"data": None, "error": str(e)}
+        self._done.put((key, result))
+
+    def _finish(self, key, result):
+        self._running.discard(key)
+        endpoint = self.groups.get(key)
+        if endpoint is not None:
+            self._schedule(key, time.monotonic() + self._next_delay(endpoint, result))
+
+    def run_pending(self, executor, now):
+        """Start the refreshes that are due, up to the concurrency limit."""
+        while self._heap and self._heap[0][0] <= now and len(self._running) < self.workers:
+            due, key = heapq.heappop(self._heap)
+            if self._due.get(key) != due:
+                continue
+            del self._due[key]
+            endpoint = self.groups[key]
+            metrics.scheduler_lag.labels(endpoint.name).observe(now - due)
+            self._running.add(key)
+            executor.submit(self._refresh, key, endpoint)
+
+    def run(self, stop=None):
+        """Refresh endpoints as they fall due while holding the scheduler lease, until stop (an Event) is set."""
+        stop = stop or threading.Event()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="custom-widget-scheduler") as executor:
+                self._run(executor, stop)
+        finally:
+            self.lease.release()
+
+    def _run(self, executor, stop):
+        while not stop.is_set():
+            now = time.monotonic()
+            if self.elect(now):
+                self.sync(now)
+                self.run_pending(executor, now)
+
+            # Sleep until the next refresh is due or a running one finishes
+            timeout = POLL_INTERVAL
+            if self._heap and len(self._running) < self.workers:
+                timeout = min(timeout, max(self._heap[0][0] - now, 0))
+            try:
+                self._finish(*self._done.get(timeout=timeout))
+                while True:
+                    self._finish(*self._done.get_nowait())
+            except queue.Empty:
+                pass
+
+    def refresh_all(self):
+        """
+        Refresh the result of every endpoint group once, now, and return the number of groups refreshed.
+
+        The lease is renewed every third of its TTL while the refreshes run, so
+        a standby node cannot take over in the middle of the pass. If it is lost
+        anyway, the refreshes not started yet are dropped. Returns None without
+        refreshing anything if another node holds the scheduler lease.
+        """
+        if not self.lease.acquire():
+            return None
+        try:
+            self.load()
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="custom-widget-scheduler") as executor:
+                futures = [executor.submit(self._refresh, key, endpoint) for key, endpoint in self.groups.items()]
+                pending = futures
+                while pending:
+                    pending = wait(pending, timeout=self.lease.ttl / 3).not_done
+                    if pending and not self.lease.renew():
+                        logger.warning(f"Refresh scheduler {self.lease.owner} lost the scheduler lease during the pass")
+                        for future in pending:
+                            future.cancel()
+                        break
+            return sum(not future.cancelled() for future in futures)
+        finally:
+            self.lease.release()
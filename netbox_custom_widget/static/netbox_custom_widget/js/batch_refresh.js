@@ -0,0 +1,82 @@
+// Refresh dashboard widgets in batches instead of one HTMX request per widget.
+// Widgets rendered with batch refresh carry data-custom-widget-endpoint and
+// data-refresh-interval; all widgets sharing an interval are refreshed with a
+// single request whose response fills each widget via out-of-band swaps.
+(function() {
+  var timers = {};
+
+  function widgets() {
+    return Array.prototype.slice.call(document.querySelectorAll('[data-custom-widget-endpoint]'));
+  }
+
+  // Page, sort and filter of a table widget, or null when it shows the default view
+  function tableState(el) {
+    var form = el.querySelector('.custom-widget-table-state');
+    if (!form) return null;
+    var state = {};
+    new FormData(form).forEach(function(value, key) { state[key] = value; });
+    return (state.page && state.page !== '1') || state.sort || state.q ? state : null;
+  }
+
+  function refresh(elements) {
+    if (!elements.length || typeof htmx === 'undefined') return;
+    // Endpoints with a paged, sorted or filtered table are refreshed per widget
+    // so the out-of-band batch response does not reset that view
+    var stateful = [];
+    elements.forEach(function(el) {
+      if (tableState(el)) stateful.push(el.dataset.customWidgetEndpoint);
+    });
+    var pks = [];
+    elements.forEach(function(el) {
+      var pk = el.dataset.customWidgetEndpoint;
+      if (stateful.indexOf(pk) !== -1) {
+        htmx.ajax('GET', el.dataset.refreshUrl, {source: el, target: el, swap: 'innerHTML', values: tableState(el) || {}});
+      } else if (pks.indexOf(pk) === -1) {
+        pks.push(pk);
+      }
+    });
+    if (!pks.length) return;
+    var query = pks.map(function(pk) { return 'pk=' + encodeURIComponent(pk); }).join('&');
+    htmx.ajax('GET', elements[0].dataset.batchUrl + '?' + query, {source: elements[0], swap: 'none'});
+  }
+
+  function refreshInterval(interval) {
+    var elements = widgets().filter(function(el) {
+      return parseInt(el.dataset.refreshInterval, 10) === interval;
+    });
+    if (!elements.length) {
+      clearInterval(timers[interval]);
+      delete timers[interval];
+      return;
+    }
+    refresh(elements);
+  }
+
+  function schedule() {
+    var pending = [];
+    widgets().forEach(function(el) {
+      if (!el.dataset.batchLoaded) {
+        el.dataset.batchLoaded = '1';
+        pending.push(el);
+      }
+      var interval = parseInt(el.dataset.refreshInterval, 10);
+      if (interval > 0 && !timers[interval]) {
+        timers[interval] = setInterval(function() { refreshInterval(interval); }, interval * 1000);
+      }
+    });
+    // Initial load of newly rendered widgets, all in one request
+    refresh(pending);
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', schedule);
+  } else {
+    schedule();
+  }
+  // Widgets added or reconfigured on the dashboard are swapped in via HTMX
+  document.addEventListener('htmx:afterSettle', function(e) {
+    if (e.target.querySelector && e.target.querySelector('[data-custom-widget-endpoint]:not([data-batch-loaded])')) {
+      schedule();
+    }
+  });
+})();
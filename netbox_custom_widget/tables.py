@@ -17,7 +17,9 @@ class CustomAPIEndpointTable(NetBoxTable):
         ),
     )
     http_method = ChoiceFieldColumn()
+    pagination = ChoiceFieldColumn()
     display_mode = ChoiceFieldColumn()
+    sort_order = ChoiceFieldColumn()
     tags = columns.TagColumn(url_name="plugins:netbox_custom_widget:customapiendpoint_list")
 
     class Meta(NetBoxTable.Meta):
@@ -28,8 +30,13 @@ class CustomAPIEndpointTable(NetBoxTable):
             "name",
             "url",
             "http_method",
+            "pagination",
             "display_mode",
             "refresh_interval",
+            "stale_while_revalidate",
+            "sort_by",
+            "sort_order",
+            "limit",
             "verify_ssl",
             "timeout",
             "description",
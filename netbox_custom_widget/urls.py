@@ -80,7 +80,14 @@ urlpatterns = [
         name="bookmarklink_journal",
         kwargs={"model": models.BookmarkLink},
     ),
+    # Prometheus metrics
+    path("metrics/", views.MetricsView.as_view(), name="metrics"),
     # HTMX widget refresh
+    path(
+        "refresh/",
+        views.WidgetBatchRefreshView.as_view(),
+        name="widget_batch_refresh",
+    ),
     path(
         "refresh/<int:pk>/",
         views.WidgetRefreshView.as_view(),
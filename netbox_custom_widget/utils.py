@@ -1,15 +1,72 @@
 """Utility functions for NetBox Custom Widget plugin."""
 
-import hashlib
-import json
+import heapq
 import logging
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from urllib.parse import urlencode
 
-import requests
-from django.core.cache import cache
+from django.conf import settings
+
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
 
+_MISSING = object()
+
+
+def get_plugin_setting(name, default=None):
+    """Read a setting from this plugin's PLUGINS_CONFIG section."""
+    return settings.PLUGINS_CONFIG.get("netbox_custom_widget", {}).get(name, default)
+
+
+# Shared thread pools by name, each created on first use
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name, setting, default):
+    """Return the process-wide thread pool called name, sized by a plugin setting when it is first created."""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = ThreadPoolExecutor(
+                max_workers=get_plugin_setting(setting, default),
+                thread_name_prefix=f"custom-widget-{name}",
+            )
+        return executor
+
+
+@lru_cache(maxsize=4096)
+def split_field_path(field_path):
+    """Split a dot-notation path into a tuple of parts (memoized)."""
+    if not field_path:
+        return ()
+    return tuple(field_path.split("."))
+
+
+def _step(current, part):
+    """Resolve a single path part against a list or dict, or return _MISSING."""
+    try:
+        if isinstance(current, (list, tuple)):
+            return current[int(part)]
+        if isinstance(current, dict):
+            if part in current:
+                return current[part]
+            if part.isdigit():
+                return current[int(part)]
+    except (IndexError, KeyError, ValueError, TypeError):
+        pass
+    return _MISSING
+
+
 def extract_field(data, field_path):
     """
     Extract a value from nested JSON data using dot-notation path.
@@ -26,53 +83,101 @@ def extract_field(data, field_path):
         return None
 
     current = data
-    for part in field_path.split("."):
-        try:
-            if isinstance(current, (list, tuple)):
-                current = current[int(part)]
-            elif isinstance(current, dict):
-                if part in current:
-                    current = current[part]
-                elif part.isdigit():
-                    current = current[int(part)]
-                else:
-                    return None
-            else:
-                return None
-        except (IndexError, KeyError, ValueError, TypeError):
+    for part in split_field_path(field_path):
+        current = _step(current, part)
+        if current is _MISSING:
             return None
 
     return current
 
 
-def get_adaptive_color(value):
+# Adaptive color keywords in priority order: the first color with a keyword
+# contained in the value wins. Overridable with the "adaptive_keywords" setting.
+ADAPTIVE_KEYWORDS = {
+    # Active/Up states
+    "blue": ["active", "insvc", "in service"],
+    # Up/OK/Running
+    "green": ["up", "ok", "running", "online", "healthy", "on duty"],
+    # Down/Error states
+    "red": ["down", "isolated", "error", "failed", "offline", "critical"],
+    # Warning/Idle states
+    "orange": ["standby", "idle", "not active", "configured", "warning", "degraded", "paused"],
+}
+
+# Distinct values remembered per matcher before its memo is reset
+ADAPTIVE_MEMO_SIZE = 4096
+
+
+class AdaptiveMatcher:
     """
-    Determine Bootstrap color class based on status value text.
+    All adaptive color keywords compiled into a single regex.
 
-    Matches Homepage's custom.js UCCE process status coloring.
+    The alternation sits in a lookahead, so one scan reports a keyword at
+    every position of the value, and alternatives are ordered by color
+    priority, so the best color found equals the result of checking each
+    color's keywords in turn. Results are memoized per distinct value.
     """
-    if value is None:
-        return ""
 
-    val = str(value).lower().strip()
+    def __init__(self, keywords):
+        self.keywords = keywords
+        self._badges = []
+        self._priority = {}
+        for priority, (color, words) in enumerate(keywords.items()):
+            self._badges.append(f"badge text-bg-{color}")
+            for word in words:
+                if word:
+                    self._priority.setdefault(word.lower(), priority)
+
+        alternatives = sorted(self._priority, key=self._priority.get)
+        self._pattern = re.compile(f"(?=({'|'.join(map(re.escape, alternatives))}))") if alternatives else None
+        self._memo = {}
+
+    def match(self, text):
+        """Return the badge class for already lowercased and stripped text."""
+        best = None
+        if self._pattern is not None:
+            for found in self._pattern.finditer(text):
+                priority = self._priority[found.group(1)]
+                if best is None or priority < best:
+                    best = priority
+                    if best == 0:
+                        break
+        return self._badges[best] if best is not None else ""
+
+    def color(self, value):
+        if value is None:
+            return ""
+        text = str(value)
+        try:
+            return self._memo[text]
+        except KeyError:
+            pass
+        if len(self._memo) >= ADAPTIVE_MEMO_SIZE:
+            self._memo.clear()
+        result = self._memo[text] = self.match(text.lower().strip())
+        return result
 
-    # Active/Up states -> blue
-    if any(kw in val for kw in ("active", "insvc", "in service")):
-        return "badge text-bg-blue"
 
-    # Up/OK/Running -> green
-    if any(kw in val for kw in ("up", "ok", "running", "online", "healthy", "on duty")):
-        return "badge text-bg-green"
+_adaptive_matcher = None
 
-    # Down/Error states -> red
-    if any(kw in val for kw in ("down", "isolated", "error", "failed", "offline", "critical")):
-        return "badge text-bg-red"
 
-    # Warning/Idle states -> orange
-    if any(kw in val for kw in ("standby", "idle", "not active", "configured", "warning", "degraded", "paused")):
-        return "badge text-bg-orange"
+def _get_adaptive_matcher():
+    global _adaptive_matcher
+    keywords = get_plugin_setting("adaptive_keywords") or ADAPTIVE_KEYWORDS
+    matcher = _adaptive_matcher
+    if matcher is None or matcher.keywords is not keywords:
+        matcher = _adaptive_matcher = AdaptiveMatcher(keywords)
+    return matcher
 
-    return ""
+
+def get_adaptive_color(value):
+    """
+    Determine Bootstrap color class based on status value text.
+
+    Matches Homepage's custom.js UCCE process status coloring. Keywords come
+    from ADAPTIVE_KEYWORDS or the "adaptive_keywords" plugin setting.
+    """
+    return _get_adaptive_matcher().color(value)
 
 
 def get_threshold_color(value, thresholds):
@@ -109,6 +214,88 @@ def get_threshold_color(value, thresholds):
     return ""
 
 
+class ThresholdRules:
+    """
+    Compiled form of a threshold rule list, equivalent to get_threshold_color.
+
+    Rules only ever compare against their own lt/gt boundaries, so the result
+    is constant between (and at) consecutive boundaries. The rule list is
+    evaluated once per region at build time; classifying a value is then a
+    bisect over the sorted boundaries, and whole columns are classified in a
+    single pass.
+    """
+
+    def __init__(self, thresholds):
+        self.rules = []
+        for rule in thresholds or []:
+            color = rule.get("color", "")
+            self.rules.append(
+                (rule.get("lt"), "lt" in rule, rule.get("gt"), "gt" in rule, f"badge text-bg-{color}" if color else "")
+            )
+
+        try:
+            bounds = sorted({float(b) for lt, has_lt, gt, has_gt, _ in self.rules for b in (lt, gt) if b is not None})
+        except (TypeError, ValueError):
+            bounds = None
+        if bounds is not None and any(b != b for b in bounds):
+            bounds = None
+
+        self._bounds = bounds
+        if bounds is None:
+            # Non-numeric boundaries: keep the sequential evaluation
+            self.lookup = self._evaluate
+            return
+
+        # Region 2i is the open interval below bounds[i], region 2i + 1 is bounds[i] itself
+        regions = []
+        for b in bounds:
+            regions.append(self._evaluate(math.nextafter(b, -math.inf)))
+            regions.append(self._evaluate(b))
+        regions.append(self._evaluate(math.nextafter(bounds[-1], math.inf) if bounds else 0.0))
+        self._regions = regions
+        self._nan = self._evaluate(math.nan)
+
+    def _evaluate(self, num):
+        for lt, has_lt, gt, has_gt, badge in self.rules:
+            if has_lt and num < lt:
+                return badge
+            elif has_gt and num > gt:
+                return badge
+            elif not has_lt and not has_gt:
+                return badge
+        return ""
+
+    def lookup(self, num):
+        """Return the badge class for a float value."""
+        if num != num:
+            return self._nan
+        i = bisect_left(self._bounds, num)
+        if i < len(self._bounds) and self._bounds[i] == num:
+            return self._regions[2 * i + 1]
+        return self._regions[2 * i]
+
+    def __call__(self, value):
+        try:
+            num = float(value)
+        except (TypeError, ValueError):
+            return ""
+        return self.lookup(num)
+
+    def column(self, values):
+        """Classify a whole column of values in one pass."""
+        lookup = self.lookup
+        out = []
+        append = out.append
+        for value in values:
+            try:
+                num = float(value)
+            except (TypeError, ValueError):
+                append("")
+                continue
+            append(lookup(num))
+        return out
+
+
 def get_static_color(color_name):
     """Map color name to Bootstrap class."""
     color_map = {
@@ -123,73 +310,89 @@ def get_static_color(color_name):
     return color_map.get(color_name, "")
 
 
-def _make_cache_key(endpoint):
-    """Build a stable cache key from endpoint config."""
-    raw = f"{endpoint.pk}:{endpoint.url}:{endpoint.http_method}:{endpoint.body}"
-    digest = hashlib.md5(raw.encode()).hexdigest()
-    return f"custom_widget:api:{digest}"
+# ISO 8601 duration: P[nD]T[nH][nM][nS]
+_ISO_DURATION_RE = re.compile(r"^P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?$", re.IGNORECASE)
 
+# Distinct duration strings remembered by format_duration
+DURATION_MEMO_SIZE = 8192
 
-def fetch_api_data(endpoint):
-    """
-    Make an HTTP request to the configured API endpoint.
 
-    Results are cached in Redis for the endpoint's refresh_interval so that
-    multiple browser tabs / users share a single upstream call per cycle.
+def _join_duration(days, hours, minutes):
+    pieces = []
+    if days > 0:
+        pieces.append(f"{days}d")
+    if hours > 0:
+        pieces.append(f"{hours}h")
+    if minutes > 0:
+        pieces.append(f"{minutes}m")
+    return " ".join(pieces)
 
-    Args:
-        endpoint: CustomAPIEndpoint model instance
 
-    Returns:
-        dict with keys: data (parsed JSON), error (str or None)
-    """
-    cache_ttl = endpoint.refresh_interval or 0
-    if cache_ttl > 0:
-        cache_key = _make_cache_key(endpoint)
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return cached
+def _parse_iso_duration(s):
+    """Format an ISO 8601 duration, or return None if s is not one."""
+    iso_match = _ISO_DURATION_RE.match(s)
+    if not iso_match:
+        return None
+    days = int(iso_match.group(1) or 0)
+    hours = int(iso_match.group(2) or 0)
+    minutes = int(iso_match.group(3) or 0)
+    return _join_duration(days, hours, minutes) or "0m"
+
 
+def _parse_clock_duration(s):
+    """Format a .NET TimeSpan or HH:MM:SS value, or return None if s has no colon."""
+    if ":" not in s:
+        return None
     try:
-        kwargs = {
-            "headers": endpoint.headers or {},
-            "timeout": endpoint.timeout or 30,
-            "verify": endpoint.verify_ssl,
-        }
-
-        if endpoint.http_method == "POST" and endpoint.body:
-            kwargs["data"] = endpoint.body
-            if "Content-Type" not in kwargs["headers"]:
-                kwargs["headers"]["Content-Type"] = "application/json"
-
-        response = requests.request(
-            method=endpoint.http_method,
-            url=endpoint.url,
-            **kwargs,
-        )
-        response.raise_for_status()
+        days = 0
+        time_str = s
+        # .NET format: days before first dot if dot comes before colon
+        if "." in s.split(":")[0]:
+            day_part, time_str = s.split(".", 1)
+            days = int(day_part)
+        # Strip fractional seconds
+        time_part = time_str.split(".")[0] if "." in time_str else time_str
+        parts = time_part.split(":")
+        hours = int(parts[0]) if len(parts) > 0 else 0
+        minutes = int(parts[1]) if len(parts) > 1 else 0
+        return _join_duration(days, hours, minutes) or "0m"
+    except (ValueError, IndexError):
+        return s
+
+
+def _format_seconds(num):
+    """Format a number of seconds (or milliseconds, when > 100M) as a duration."""
+    # Heuristic: values > 100M are likely milliseconds
+    if num > 100_000_000:
+        num = num / 1000
+    total_seconds = int(num)
+    days = total_seconds // 86400
+    hours = (total_seconds % 86400) // 3600
+    minutes = (total_seconds % 3600) // 60
+    return _join_duration(days, hours, minutes) or f"{total_seconds}s"
+
+
+def _parse_numeric_duration(s):
+    """Format a numeric seconds/milliseconds string, or return None if s is not numeric."""
+    try:
+        return _format_seconds(float(s))
+    except (ValueError, TypeError):
+        return None
 
-        result = {"data": response.json(), "error": None}
 
-    except requests.exceptions.Timeout:
-        result = {"data": None, "error": f"Request timed out ({endpoint.timeout}s)"}
-    except requests.exceptions.ConnectionError:
-        result = {"data": None, "error": "Connection failed"}
-    except requests.exceptions.HTTPError as e:
-        result = {"data": None, "error": f"HTTP {e.response.status_code}"}
-    except ValueError:
-        result = {"data": None, "error": "Invalid JSON response"}
-    except Exception as e:
-        logger.warning(f"API call failed for {endpoint.name}: {e}")
-        result = {"data": None, "error": str(e)}
+# The shapes are mutually exclusive, so the first parser returning a result wins
+_DURATION_PARSERS = (_parse_iso_duration, _parse_clock_duration, _parse_numeric_duration)
 
-    # Cache successful responses for refresh_interval seconds.
-    # Errors are cached for a shorter period to allow quick recovery.
-    if cache_ttl > 0:
-        ttl = cache_ttl if result["error"] is None else min(cache_ttl, 5)
-        cache.set(cache_key, result, ttl)
 
-    return result
+@lru_cache(maxsize=DURATION_MEMO_SIZE)
+def _format_duration_text(s):
+    for parser in _DURATION_PARSERS:
+        result = parser(s)
+        if result is not None:
+            return result
+
+    # Already human-readable or unrecognized — return as-is
+    return s
 
 
 def format_duration(value):
@@ -205,78 +408,87 @@ def format_duration(value):
     - Human-readable: "7 days 18 hours" (returned as-is)
 
     Returns formatted string or original value if format not recognized.
+    Results are memoized per distinct input string.
     """
-    import re
-
-    s = str(value).strip()
-
-    # ISO 8601 duration: P[nD]T[nH][nM][nS]
-    iso_match = re.match(r"^P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?$", s, re.IGNORECASE)
-    if iso_match:
-        days = int(iso_match.group(1) or 0)
-        hours = int(iso_match.group(2) or 0)
-        minutes = int(iso_match.group(3) or 0)
-        pieces = []
-        if days > 0:
-            pieces.append(f"{days}d")
-        if hours > 0:
-            pieces.append(f"{hours}h")
-        if minutes > 0:
-            pieces.append(f"{minutes}m")
-        return " ".join(pieces) if pieces else "0m"
-
-    # .NET TimeSpan or HH:MM:SS variants
-    if ":" in s:
+    return _format_duration_text(str(value).strip())
+
+
+def _duration_seconds(value):
+    """Return a duration in seconds, accepting the same shapes as format_duration, or None if unrecognized."""
+    if value.__class__ is int or value.__class__ is float:
+        num = float(value)
+    else:
+        s = str(value).strip()
+        iso_match = _ISO_DURATION_RE.match(s)
+        if iso_match:
+            days, hours, minutes = (int(iso_match.group(i) or 0) for i in (1, 2, 3))
+            return days * 86400 + hours * 3600 + minutes * 60 + float(iso_match.group(4) or 0)
+        if ":" in s:
+            try:
+                days, time_str = 0, s
+                if "." in s.split(":")[0]:
+                    day_part, time_str = s.split(".", 1)
+                    days = int(day_part)
+                parts = [float(part) for part in time_str.split(":")]
+            except ValueError:
+                return None
+            return days * 86400 + sum(part * 60**power for power, part in zip((2, 1, 0), parts))
         try:
-            days = 0
-            time_str = s
-            # .NET format: days before first dot if dot comes before colon
-            if "." in s.split(":")[0]:
-                day_part, time_str = s.split(".", 1)
-                days = int(day_part)
-            # Strip fractional seconds
-            time_part = time_str.split(".")[0] if "." in time_str else time_str
-            parts = time_part.split(":")
-            hours = int(parts[0]) if len(parts) > 0 else 0
-            minutes = int(parts[1]) if len(parts) > 1 else 0
-
-            pieces = []
-            if days > 0:
-                pieces.append(f"{days}d")
-            if hours > 0:
-                pieces.append(f"{hours}h")
-            if minutes > 0:
-                pieces.append(f"{minutes}m")
-            return " ".join(pieces) if pieces else "0m"
-        except (ValueError, IndexError):
-            return s
-
-    # Numeric seconds or milliseconds
+            num = float(s)
+        except ValueError:
+            return None
+    if num != num:
+        return None
+    # Same milliseconds heuristic as _format_seconds
+    return num / 1000 if num > 100_000_000 else num
+
+
+class DurationColumnFormatter:
+    """
+    format_duration for a single column.
+
+    The input shape is detected from the first value seen and its parser is
+    called directly for the following cells; cells of another shape fall
+    back to the general (memoized) detection. Numbers skip string parsing.
+    """
+
+    def __init__(self):
+        self.parser = None
+
+    def __call__(self, value):
+        if value.__class__ is int or value.__class__ is float:
+            try:
+                return _format_seconds(float(value))
+            except ValueError:
+                return str(value)
+
+        s = str(value).strip()
+        parser = self.parser
+        if parser is None:
+            parser = self.parser = next((p for p in _DURATION_PARSERS if p(s) is not None), _format_duration_text)
+        result = parser(s)
+        return result if result is not None else _format_duration_text(s)
+
+
+def _format_number(value):
+    """Comma-separate an integer value, returning the input unchanged on failure."""
     try:
-        num = float(s)
-        # Heuristic: values > 100M are likely milliseconds
-        if num > 100_000_000:
-            num = num / 1000
-        total_seconds = int(num)
-        days = total_seconds // 86400
-        hours = (total_seconds % 86400) // 3600
-        minutes = (total_seconds % 3600) // 60
-
-        pieces = []
-        if days > 0:
-            pieces.append(f"{days}d")
-        if hours > 0:
-            pieces.append(f"{hours}h")
-        if minutes > 0:
-            pieces.append(f"{minutes}m")
-        if not pieces:
-            return f"{total_seconds}s"
-        return " ".join(pieces)
+        return f"{int(value):,}"
     except (ValueError, TypeError):
-        pass
+        return value
 
-    # Already human-readable or unrecognized — return as-is
-    return s
+
+_FORMATTERS = {
+    "number": _format_number,
+    "duration": format_duration,
+}
+
+
+def make_column_formatter(fmt):
+    """Return the formatter callable for one column of the given format, or None for text."""
+    if fmt == "duration":
+        return DurationColumnFormatter()
+    return _FORMATTERS.get(fmt)
 
 
 def format_value(value, fmt):
@@ -291,16 +503,341 @@ def format_value(value, fmt):
     if value is None:
         return value
 
-    if fmt == "number":
+    formatter = _FORMATTERS.get(fmt)
+    if formatter is None:
+        return value
+    return formatter(value)
+
+
+def _no_color(value):
+    return ""
+
+
+def _compile_color(mapping):
+    """Bind the color strategy of a mapping to a callable taking the color target."""
+    color = mapping.get("color", "")
+    if color == "adaptive":
+        return get_adaptive_color
+    if color == "threshold":
+        return ThresholdRules(mapping.get("thresholds", []))
+    if color:
+        color_class = get_static_color(color)
+        return lambda value: color_class
+    return _no_color
+
+
+def _memoize_column(func, values):
+    """Apply func to each value of a column, computing it once per distinct value."""
+    memo = {}
+    out = []
+    append = out.append
+    for value in values:
+        # Key on type as well so that e.g. True and 1 are not conflated
+        key = (value.__class__, value)
         try:
-            return f"{int(value):,}"
-        except (ValueError, TypeError):
-            return value
+            result = memo[key]
+        except KeyError:
+            result = memo[key] = func(value)
+        except TypeError:
+            # Unhashable (dict/list) values are computed directly
+            result = func(value)
+        append(result)
+    return out
+
+
+def _compile_column_color(mapping, colorize):
+    """Build the column-wide counterpart of a mapping's color callable."""
+    if isinstance(colorize, ThresholdRules):
+        return colorize.column
+    if colorize is get_adaptive_color:
+        return lambda values: _memoize_column(get_adaptive_color, values)
+    color_class = colorize(None)
+    return lambda values: [color_class] * len(values)
+
+
+def _format_column(formatter, values):
+    """Format a column in bulk, leaving None values untouched."""
+    if formatter is None:
+        return values
+    return _memoize_column(lambda value: formatter(value) if value is not None else None, values)
+
+
+def _build_path_tree(paths):
+    """
+    Build a prefix tree from path tuples so shared prefixes are traversed once.
 
-    if fmt == "duration":
-        return format_duration(value)
+    Each node is a (slots, children) pair where slots lists the indexes of the
+    paths ending at that node and children is a tuple of (part, node) pairs.
+    """
+    root = {}
+    for slot, parts in enumerate(paths):
+        node = root
+        for part in parts:
+            node = node.setdefault(part, {})
+        node.setdefault(None, []).append(slot)
+
+    def freeze(node):
+        slots = tuple(node.get(None, ()))
+        children = tuple((part, freeze(child)) for part, child in node.items() if part is not None)
+        return slots, children
+
+    return freeze(root)
+
+
+def _extract_tree(current, node, out):
+    slots, children = node
+    for slot in slots:
+        out[slot] = current
+    for part, child in children:
+        value = _step(current, part)
+        if value is not _MISSING:
+            _extract_tree(value, child, out)
+
+
+def _extract_tree_columns(column, node, out):
+    """Columnar counterpart of _extract_tree: walk each tree level once for a whole column."""
+    slots, children = node
+    if slots:
+        values = [None if value is _MISSING else value for value in column]
+        for slot in slots:
+            out[slot] = values
+    for part, child in children:
+        _extract_tree_columns([_MISSING if value is _MISSING else _step(value, part) for value in column], child, out)
+
+
+class CompiledMapping:
+    """A single mapping entry with its paths resolved and color/format strategies bound."""
+
+    __slots__ = (
+        "label",
+        "header",
+        "width",
+        "suffix",
+        "format",
+        "field",
+        "value_slot",
+        "additional_slot",
+        "colorize",
+        "colorize_column",
+        "formatter",
+    )
+
+    def __init__(self, mapping, index, slot_for):
+        field = mapping.get("field", "")
+        additional_field = mapping.get("additional_field")
+
+        self.field = field
+        self.label = mapping.get("label", "")
+        self.header = mapping.get("label") or mapping.get("field", f"Column {index + 1}")
+        self.width = mapping.get("width", "")
+        self.suffix = mapping.get("suffix", "")
+        self.format = mapping.get("format", "text")
+        self.value_slot = slot_for(field)
+        self.additional_slot = slot_for(additional_field) if additional_field else None
+        self.colorize = _compile_color(mapping)
+        self.colorize_column = _compile_column_color(mapping, self.colorize)
+        self.formatter = make_column_formatter(self.format)
+
+
+def _as_number(value):
+    """Return value as a float for numeric comparison, or None if it is not numeric."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+def _values_equal(value, expected):
+    number, other = _as_number(value), _as_number(expected)
+    if number is not None and other is not None:
+        return number == other
+    if value is None or expected is None:
+        return value is expected
+    return str(value).lower() == str(expected).lower()
+
+
+def _compare(op):
+    def test(value, expected):
+        number, other = _as_number(value), _as_number(expected)
+        return number is not None and other is not None and op(number, other)
+
+    return test
+
+
+# Operators usable in an endpoint's "where" conditions: (value, expected) -> bool
+ROW_FILTER_OPERATORS = {
+    "eq": _values_equal,
+    "ne": lambda value, expected: not _values_equal(value, expected),
+    "gt": _compare(lambda a, b: a > b),
+    "gte": _compare(lambda a, b: a >= b),
+    "lt": _compare(lambda a, b: a < b),
+    "lte": _compare(lambda a, b: a <= b),
+    "contains": lambda value, expected: value is not None and str(expected).lower() in str(value).lower(),
+    "in": lambda value, expected: any(_values_equal(value, e) for e in expected),
+}
+
+
+def compile_row_filter(where):
+    """
+    Compile an endpoint's "where" conditions into a predicate over array items.
+
+    where is a list of {"field": <dot path>, "op": <operator>, "value": ...}
+    conditions that must all match; "op" defaults to "eq". Returns None when
+    there are no conditions and raises ValueError for malformed ones.
+    """
+    if not where:
+        return None
+    if not isinstance(where, list):
+        raise ValueError("Expected a list of conditions")
+
+    conditions = []
+    for i, condition in enumerate(where):
+        if not isinstance(condition, dict) or not condition.get("field"):
+            raise ValueError(f'Condition {i + 1} must be an object with a "field"')
+        op = condition.get("op", "eq")
+        if op not in ROW_FILTER_OPERATORS:
+            raise ValueError(f'Condition {i + 1} has unknown operator "{op}"')
+        expected = condition.get("value")
+        if op == "in" and not isinstance(expected, list):
+            raise ValueError(f'Condition {i + 1} needs a list value for "in"')
+        conditions.append((condition["field"], ROW_FILTER_OPERATORS[op], expected))
+
+    def predicate(item):
+        return all(test(extract_field(item, field), expected) for field, test, expected in conditions)
+
+    return predicate
+
+
+class RowSelection:
+    """
+    Filter, top-N and limit directives applied to an array response before mapping.
+
+    Rows are filtered lazily, and a sort with a limit keeps only the top rows
+    with heapq instead of sorting the whole array, so only the selected rows
+    reach the (comparatively expensive) mapping, coloring and formatting.
+    """
+
+    def __init__(self, where=None, sort_by="", sort_order="asc", limit=0):
+        self.predicate = compile_row_filter(where)
+        self.sort_by = sort_by or ""
+        self.descending = sort_order == "desc"
+        self.limit = limit or 0
+        fields = [self.sort_by] + [c["field"] for c in where or []]
+        self.paths = {split_field_path(f) for f in fields if f}
+
+    @classmethod
+    def from_endpoint(cls, endpoint):
+        """Return the endpoint's RowSelection, or None if it has no directives."""
+        where, sort_by, limit = endpoint.where, endpoint.sort_by, endpoint.limit
+        if not (where or sort_by or limit):
+            return None
+        try:
+            return cls(where, sort_by, endpoint.sort_order, limit)
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid row filter on endpoint {endpoint.name}: {e}")
+            return cls(None, sort_by, endpoint.sort_order, limit)
+
+    def _sort_key(self, item):
+        # Numbers before text and rows missing the field last, in either order
+        value = extract_field(item, self.sort_by)
+        if value is None:
+            return (-1 if self.descending else 3, 0.0, "")
+        number = _as_number(value)
+        if number is not None:
+            return (2 if self.descending else 0, number, "")
+        return (1, 0.0, str(value).lower())
+
+    def apply(self, items):
+        rows = items if self.predicate is None else filter(self.predicate, items)
+        if self.sort_by:
+            if self.limit:
+                select = heapq.nlargest if self.descending else heapq.nsmallest
+                return select(self.limit, rows, key=self._sort_key)
+            return sorted(rows, key=self._sort_key, reverse=self.descending)
+        if self.limit:
+            return list(islice(rows, self.limit))
+        return rows if rows is items else list(rows)
+
+
+class MappingPlan:
+    """
+    Pre-compiled form of an endpoint's mappings.
+
+    Dot paths are split once and merged into a prefix tree, and each mapping's
+    color strategy and formatter are bound up front, so applying the plan to a
+    response (or to every row of an array response) does no per-cell parsing
+    or string dispatch. The endpoint's RowSelection, if any, is kept alongside.
+    """
+
+    def __init__(self, mappings, selection=None):
+        self.selection = selection
+        self.paths = []
+        slots = {}
+
+        def slot_for(field_path):
+            parts = split_field_path(field_path)
+            if not parts:
+                return None
+            if parts not in slots:
+                slots[parts] = len(self.paths)
+                self.paths.append(parts)
+            return slots[parts]
+
+        self.mappings = [CompiledMapping(m, i, slot_for) for i, m in enumerate(mappings or [])]
+        self.columns = [{"header": m.header, "width": m.width, "format": m.format} for m in self.mappings]
+        self._tree = _build_path_tree(self.paths)
+
+    def extract(self, data):
+        """Resolve every referenced path against data, returning values indexed by slot."""
+        out = [None] * len(self.paths)
+        if data is not None:
+            _extract_tree(data, self._tree, out)
+        return out
+
+    def extract_columns(self, items):
+        """Resolve every referenced path against each item, returning one list of values per slot."""
+        out = [None] * len(self.paths)
+        _extract_tree_columns(list(items), self._tree, out)
+        return out
+
+
+# Compiled plans keyed by endpoint pk, each stored with the last_updated it was built from
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+_PLAN_CACHE_SIZE = 512
+
+
+def get_mapping_plan(endpoint):
+    """
+    Return the compiled MappingPlan for an endpoint.
+
+    Plans are cached per process keyed on the endpoint's pk and last_updated,
+    so they are rebuilt only when the endpoint is edited.
+    """
+    if endpoint.pk is None:
+        return MappingPlan(endpoint.mappings, RowSelection.from_endpoint(endpoint))
 
-    return value
+    version = endpoint.last_updated
+    with _plan_cache_lock:
+        entry = _plan_cache.get(endpoint.pk)
+        if entry is not None and entry[0] == version:
+            _plan_cache.move_to_end(endpoint.pk)
+            return entry[1]
+
+    plan = MappingPlan(endpoint.mappings, RowSelection.from_endpoint(endpoint))
+    with _plan_cache_lock:
+        _plan_cache[endpoint.pk] = (version, plan)
+        _plan_cache.move_to_end(endpoint.pk)
+        while len(_plan_cache) > _PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def _as_plan(mappings):
+    return mappings if isinstance(mappings, MappingPlan) else MappingPlan(mappings)
 
 
 def process_mappings(data, mappings):
@@ -309,55 +846,128 @@ def process_mappings(data, mappings):
 
     Args:
         data: Parsed JSON response data
-        mappings: List of mapping dicts from endpoint config
+        mappings: List of mapping dicts from endpoint config, or a compiled MappingPlan
 
     Returns:
         List of dicts with keys: label, value, additional_value,
         color_class, suffix, format
     """
+    plan = _as_plan(mappings)
+    values = plan.extract(data)
     results = []
 
-    for mapping in mappings:
-        field_path = mapping.get("field", "")
-        value = extract_field(data, field_path)
+    for m in plan.mappings:
+        value = values[m.value_slot] if m.value_slot is not None else None
+        additional_value = values[m.additional_slot] if m.additional_slot is not None else None
 
-        # Get additional field if specified
-        additional_field = mapping.get("additional_field")
-        additional_value = extract_field(data, additional_field) if additional_field else None
-
-        # Determine color class
-        color = mapping.get("color", "")
-        if color == "adaptive":
-            # Apply adaptive coloring to additional_value if present, else value
-            color_target = additional_value if additional_value is not None else value
-            color_class = get_adaptive_color(color_target)
-        elif color == "threshold":
-            thresholds = mapping.get("thresholds", [])
-            color_target = additional_value if additional_value is not None else value
-            color_class = get_threshold_color(color_target, thresholds)
-        elif color:
-            color_class = get_static_color(color)
-        else:
-            color_class = ""
-
-        # Format value
-        fmt = mapping.get("format", "text")
-        value = format_value(value, fmt)
+        # Adaptive and threshold coloring apply to additional_value if present, else value
+        color_class = m.colorize(additional_value if additional_value is not None else value)
+
+        if value is not None and m.formatter is not None:
+            value = m.formatter(value)
 
         results.append(
             {
-                "label": mapping.get("label", ""),
+                "label": m.label,
                 "value": value if value is not None else "N/A",
                 "additional_value": additional_value,
                 "color_class": color_class,
-                "suffix": mapping.get("suffix", ""),
-                "format": fmt,
+                "suffix": m.suffix,
+                "format": m.format,
             }
         )
 
     return results
 
 
+class ColumnarTable:
+    """
+    Table data held as processed columns.
+
+    Cells are only materialized into per-row dicts when the rows are iterated
+    (i.e. at render time). Supports the same "columns"/"rows" access as the
+    dict returned by the row-oriented path. The unformatted values are kept
+    alongside the display values for sorting.
+    """
+
+    def __init__(self, columns, values, colors, suffixes, length, raw=None):
+        self.columns = columns
+        self._values = values
+        self._raw = raw if raw is not None else values
+        self._colors = colors
+        self._suffixes = suffixes
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, key):
+        if key == "columns":
+            return self.columns
+        if key == "rows":
+            return self.rows
+        raise KeyError(key)
+
+    @property
+    def rows(self):
+        return self.take(range(self._length))
+
+    def column(self, index):
+        """Return the display values of one column."""
+        return [v if v is not None else "N/A" for v in self._values[index]]
+
+    def raw_column(self, index):
+        """Return the unformatted values of one column (None where missing)."""
+        return self._raw[index]
+
+    def take(self, indices):
+        """Materialize only the rows at the given indices, in that order."""
+        columns = list(zip(self._values, self._raw, self._colors, self._suffixes))
+        return [
+            [
+                {
+                    "value": values[i] if values[i] is not None else "N/A",
+                    "raw": raw[i],
+                    "color_class": colors[i],
+                    "suffix": suffix,
+                }
+                for values, raw, colors, suffix in columns
+            ]
+            for i in indices
+        ]
+
+
+def process_array_columns(data, mappings):
+    """
+    Column-oriented counterpart of process_array_mappings.
+
+    Each mapped column is extracted once into a list, colored in a single pass
+    (thresholds via bisect over the sorted rule boundaries, adaptive colors
+    memoized per distinct value) and formatted in bulk.
+
+    Returns:
+        ColumnarTable with "columns" and lazily materialized "rows"
+    """
+    plan = _as_plan(mappings)
+    items = data if isinstance(data, list) else list(data)
+    extracted = plan.extract_columns(items)
+    length = len(items)
+    empty = [None] * length
+
+    values, raw, colors, suffixes = [], [], [], []
+    for m in plan.mappings:
+        column = extracted[m.value_slot] if m.value_slot is not None else empty
+        colors.append(m.colorize_column(column))
+        values.append(_format_column(m.formatter, column))
+        raw.append(column)
+        suffixes.append(m.suffix)
+
+    return ColumnarTable(plan.columns, values, colors, suffixes, length, raw)
+
+
 def process_array_mappings(data, mappings):
     """
     Process an array of objects into table rows using mappings as column definitions.
@@ -367,49 +977,165 @@ def process_array_mappings(data, mappings):
 
     Args:
         data: List of dicts from API response
-        mappings: List of mapping dicts (each defines a column)
+        mappings: List of mapping dicts (each defines a column), or a compiled MappingPlan
 
     Returns:
-        dict with "headers" (list of str) and "rows" (list of lists of cell dicts)
+        dict with "headers" (list of str) and "rows" (list of lists of cell dicts).
+        Arrays of at least the "columnar_threshold" plugin setting are handed to
+        process_array_columns, which returns an equivalent ColumnarTable.
     """
-    columns = []
-    for i, m in enumerate(mappings):
-        columns.append(
-            {
-                "header": m.get("label") or m.get("field", f"Column {i + 1}"),
-                "width": m.get("width", ""),
-            }
-        )
+    plan = _as_plan(mappings)
+    threshold = get_plugin_setting("columnar_threshold", 1000)
+    if threshold and len(data) >= threshold:
+        return process_array_columns(data, plan)
+
+    compiled = [(m.value_slot, m.colorize, m.formatter, m.suffix) for m in plan.mappings]
 
     rows = []
     for item in data:
+        values = plan.extract(item)
         row = []
-        for mapping in mappings:
-            field_path = mapping.get("field", "")
-            value = extract_field(item, field_path)
-
-            # Color determination
-            color = mapping.get("color", "")
-            if color == "adaptive":
-                color_class = get_adaptive_color(value)
-            elif color == "threshold":
-                color_class = get_threshold_color(value, mapping.get("thresholds", []))
-            elif color:
-                color_class = get_static_color(color)
-            else:
-                color_class = ""
-
-            # Format value
-            fmt = mapping.get("format", "text")
-            value = format_value(value, fmt)
+        for slot, colorize, formatter, suffix in compiled:
+            raw = value = values[slot] if slot is not None else None
+            color_class = colorize(value)
+            if value is not None and formatter is not None:
+                value = formatter(value)
 
             row.append(
                 {
                     "value": value if value is not None else "N/A",
+                    "raw": raw,
                     "color_class": color_class,
-                    "suffix": mapping.get("suffix", ""),
+                    "suffix": suffix,
                 }
             )
         rows.append(row)
 
-    return {"columns": columns, "rows": rows}
+    return {"columns": plan.columns, "rows": rows}
+
+
+def _table_sort_key(value):
+    # Numbers (and numeric strings) sort numerically ahead of text, text
+    # case-insensitively, and missing values come last
+    if value is None:
+        return (2, 0.0, "")
+    text = str(value).strip().lower()
+    try:
+        number = float(value if value.__class__ is int or value.__class__ is float else text)
+    except (ValueError, OverflowError):
+        return (1, 0.0, text)
+    if number != number:
+        return (1, 0.0, text)
+    return (0, number, "")
+
+
+def _duration_sort_key(value):
+    seconds = _duration_seconds(value) if value is not None else None
+    return _table_sort_key(seconds if seconds is not None else value)
+
+
+def paginate_table(table_data, page=1, sort=None, order="asc", q="", per_page=None):
+    """
+    Filter, sort and slice table data down to a single page.
+
+    Args:
+        table_data: Output of process_array_mappings (dict or ColumnarTable)
+        page: 1-based page number, clamped to the available pages
+        sort: Index of the column to sort by, or None to keep the upstream order
+        order: "asc" or "desc"
+        q: Case-insensitive text that at least one displayed cell of a row must contain
+        per_page: Rows per page; defaults to the "table_page_size" plugin
+            setting, 0 returns every matching row
+
+    Returns:
+        dict with "columns", the page's "rows" and the paging state used by
+        the table template. Only the rows of the returned page are
+        materialized for columnar tables.
+    """
+    if per_page is None:
+        per_page = get_plugin_setting("table_page_size", 50)
+    columns = table_data["columns"]
+
+    if isinstance(table_data, ColumnarTable):
+        total = len(table_data)
+        column = table_data.column
+        raw_column = table_data.raw_column
+        take = table_data.take
+    else:
+        rows = table_data["rows"]
+        total = len(rows)
+
+        def column(index):
+            return [row[index]["value"] for row in rows]
+
+        def raw_column(index):
+            return [row[index]["raw"] for row in rows]
+
+        def take(indices):
+            return [rows[i] for i in indices]
+
+    indices = range(total)
+    needle = q.strip().lower()
+    if needle:
+        cells = [column(i) for i in range(len(columns))]
+        indices = [i for i in indices if any(needle in str(values[i]).lower() for values in cells)]
+
+    if order not in ("asc", "desc"):
+        order = "asc"
+    if sort is not None and 0 <= sort < len(columns):
+        # Sort on the unformatted values: "1,234" or "2d 5h" do not order correctly as text
+        values = raw_column(sort)
+        sort_key = _duration_sort_key if columns[sort].get("format") == "duration" else _table_sort_key
+        # Missing values stay last in either order
+        missing = [i for i in indices if values[i] is None]
+        present = [i for i in indices if values[i] is not None] if missing else indices
+        indices = sorted(present, key=lambda i: sort_key(values[i]), reverse=order == "desc") + missing
+    else:
+        sort = None
+
+    count = len(indices)
+    num_pages = max(1, -(-count // per_page)) if per_page else 1
+    page = min(max(page, 1), num_pages)
+    if per_page:
+        start = (page - 1) * per_page
+        indices = indices[start : start + per_page]
+
+    state = {"q": q} if q else {}
+    if sort is not None:
+        state = {"sort": sort, "order": order, **state}
+    return {
+        "columns": columns,
+        "rows": take(indices),
+        "paginated": bool(per_page),
+        "page": page,
+        "num_pages": num_pages,
+        "previous_page": page - 1 if page > 1 else None,
+        "next_page": page + 1 if page < num_pages else None,
+        "count": count,
+        "total": total,
+        "sort": sort,
+        "order": order,
+        "q": q,
+        "query": urlencode(state),
+        "filter_query": urlencode({"q": q} if q else {}),
+    }
+
+
+def process_result(endpoint, result):
+    """
+    Apply an endpoint's mappings to a successful fetch result.
+
+    Returns the template context entry for the result: {"table_data": ...}
+    for table endpoints returning an array (after the endpoint's where, sort
+    and limit directives), else {"mapped_data": ...}.
+    Results cached in processed form are returned as stored.
+    """
+    if result.get("processed") is not None:
+        return result["processed"]
+
+    with metrics.mapping_duration.labels(endpoint.name).time():
+        plan = get_mapping_plan(endpoint)
+        if endpoint.display_mode == "table" and isinstance(result["data"], list):
+            items = result["data"] if plan.selection is None else plan.selection.apply(result["data"])
+            return {"table_data": process_array_mappings(items, plan)}
+        return {"mapped_data": process_mappings(result["data"], plan)}
@@ -7,6 +7,11 @@ from django.template.loader import render_to_string
 from django.views import View
 from netbox.views import generic
 
+from . import metrics
+from .cache_codec import cache_get, cache_set
+from .concurrent_fetch import fetch_many
+from .endpoint_cache import get_endpoint, get_endpoints
+from .fetch import fetch_api_data, make_fragment_cache_key
 from .filtersets import BookmarkLinkFilterSet, CustomAPIEndpointFilterSet
 from .forms import (
     BookmarkLinkBulkEditForm,
@@ -20,10 +25,12 @@ from .forms import (
 )
 from .models import BookmarkLink, CustomAPIEndpoint
 from .tables import BookmarkLinkTable, CustomAPIEndpointTable
-from .utils import fetch_api_data, process_array_mappings, process_mappings
+from .utils import paginate_table, process_result
 
 logger = logging.getLogger(__name__)
 
+ENDPOINT_NOT_FOUND_HTML = '<span class="text-danger">Endpoint not found</span>'
+
 
 #
 # CustomAPIEndpoint Views
@@ -47,13 +54,12 @@ class CustomAPIEndpointView(generic.ObjectView):
     def get_extra_context(self, request, instance):
         # Fetch live data for preview
         result = fetch_api_data(instance)
-        context = {"api_result": result}
+        context = {"api_result": result, "stale": result.get("stale", False), "age": result.get("age")}
 
-        if result["data"] is not None:
-            if instance.display_mode == "table" and isinstance(result["data"], list):
-                context["table_data"] = process_array_mappings(result["data"], instance.mappings)
-            else:
-                context["mapped_data"] = process_mappings(result["data"], instance.mappings)
+        if result["data"] is not None or result.get("processed") is not None:
+            context.update(process_result(instance, result))
+            if "table_data" in context:
+                context["table_data"] = paginate_table(context["table_data"])
         else:
             context["mapped_data"] = []
 
@@ -159,33 +165,109 @@ class BookmarkLinkBulkDeleteView(generic.BulkDeleteView):
 #
 
 
+def get_table_state(params):
+    """Read the page, sort column, order and filter of a table widget from request parameters."""
+    try:
+        page = int(params.get("page", 1))
+    except ValueError:
+        page = 1
+    try:
+        sort = int(params["sort"])
+    except (KeyError, ValueError):
+        sort = None
+    return {"page": page, "sort": sort, "order": params.get("order", "asc"), "q": params.get("q", "")}
+
+
+def render_widget_content(endpoint, result, table_state=None):
+    """
+    Render the widget content fragment for an endpoint and its fetch result.
+
+    Table results are paged, sorted and filtered server-side according to
+    table_state (see get_table_state), so only one page of rows is rendered.
+    """
+    if result["error"]:
+        return render_to_string(
+            "netbox_custom_widget/widgets/custom_api_content.html",
+            {"error": result["error"], "endpoint": endpoint},
+        )
+
+    table_state = table_state or {}
+    # Identical data renders identically for every viewer, so share the fragment.
+    # Free-text filters are too varied to be worth caching.
+    fragment_key = None
+    if not table_state.get("q"):
+        variant = f"{table_state.get('page', 1)}:{table_state.get('sort')}:{table_state.get('order', 'asc')}"
+        fragment_key = make_fragment_cache_key(endpoint, result, variant)
+    if fragment_key:
+        html = cache_get(fragment_key)
+        if html is not None:
+            return html
+
+    context = {"endpoint": endpoint, "error": None, "stale": result.get("stale", False), "age": result.get("age")}
+
+    context.update(process_result(endpoint, result))
+
+    with metrics.render_duration.labels(endpoint.name).time():
+        if "table_data" in context:
+            context["table_data"] = paginate_table(context["table_data"], **table_state)
+        html = render_to_string(
+            "netbox_custom_widget/widgets/custom_api_content.html",
+            context,
+        )
+    if fragment_key:
+        cache_set(fragment_key, html, endpoint.refresh_interval)
+    return html
+
+
 class WidgetRefreshView(View):
-    """HTMX view that returns refreshed widget content for a given endpoint."""
+    """
+    HTMX view that returns refreshed widget content for a given endpoint.
+
+    Table widgets pass their "page", "sort", "order" and "q" (filter) state
+    as query parameters.
+    """
 
     def get(self, request, pk):
-        try:
-            endpoint = CustomAPIEndpoint.objects.get(pk=pk)
-        except CustomAPIEndpoint.DoesNotExist:
-            return HttpResponse('<span class="text-danger">Endpoint not found</span>')
+        endpoint = get_endpoint(pk)
+        if endpoint is None:
+            return HttpResponse(ENDPOINT_NOT_FOUND_HTML)
 
         result = fetch_api_data(endpoint)
+        return HttpResponse(render_widget_content(endpoint, result, get_table_state(request.GET)))
 
-        if result["error"]:
-            html = render_to_string(
-                "netbox_custom_widget/widgets/custom_api_content.html",
-                {"error": result["error"], "endpoint": endpoint},
-            )
-            return HttpResponse(html)
 
-        context = {"endpoint": endpoint, "error": None}
+class WidgetBatchRefreshView(View):
+    """
+    HTMX view that refreshes several widgets in one request.
 
-        if endpoint.display_mode == "table" and isinstance(result["data"], list):
-            context["table_data"] = process_array_mappings(result["data"], endpoint.mappings)
-        else:
-            context["mapped_data"] = process_mappings(result["data"], endpoint.mappings)
+    Takes endpoint pks as repeated "pk" query parameters, fetches the
+    endpoints concurrently and returns each content fragment as an
+    out-of-band swap targeting every widget bound to that endpoint.
+    """
 
-        html = render_to_string(
-            "netbox_custom_widget/widgets/custom_api_content.html",
-            context,
-        )
-        return HttpResponse(html)
+    def get(self, request):
+        pks = []
+        for value in request.GET.getlist("pk"):
+            try:
+                pks.append(int(value))
+            except ValueError:
+                continue
+
+        endpoints = get_endpoints(pks)
+        results = fetch_many(endpoints.values())
+
+        fragments = []
+        for pk in dict.fromkeys(pks):
+            endpoint = endpoints.get(pk)
+            html = render_widget_content(endpoint, results[pk]) if endpoint else ENDPOINT_NOT_FOUND_HTML
+            fragments.append(f'<div hx-swap-oob="innerHTML:.custom-widget-endpoint-{pk}">{html}</div>')
+
+        return HttpResponse("".join(fragments))
+
+
+class MetricsView(View):
+    """Expose the plugin's fetch, cache and render metrics in Prometheus text format."""
+
+    def get(self, request):
+        body, content_type = metrics.generate_metrics()
+        return HttpResponse(body, content_type=content_type)
@@ -1,15 +1,19 @@
 """Dashboard widgets for the NetBox Custom Widget plugin."""
 
 import logging
+import threading
 from itertools import groupby
 
 from django import forms
+from django.core.signals import request_finished, request_started
 from django.template.loader import render_to_string
 from django.utils.translation import gettext as _
 from extras.dashboard.utils import register_widget
 from extras.dashboard.widgets import DashboardWidget, WidgetConfigForm
 
+from .endpoint_cache import get_endpoints
 from .models import BookmarkLink, CustomAPIEndpoint
+from .utils import get_plugin_setting
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,52 @@ logger = logging.getLogger(__name__)
 BOOKMARKS_ENDPOINT_ID = "bookmarks"
 
 
+class EndpointLoader(threading.local):
+    """
+    Per-request batch loader for the endpoints referenced by dashboard widgets.
+
+    Widgets register their endpoint ID when constructed. The first lookup
+    fetches every pending endpoint at once through the endpoint config cache
+    (a single query for any misses), and title resolution and rendering then
+    share the loaded rows. The loader is cleared at the start and end of each
+    request so rows never outlive the request.
+    """
+
+    def __init__(self):
+        self.pending = set()
+        self.loaded = {}
+
+    def register(self, pk):
+        if pk not in self.loaded:
+            self.pending.add(pk)
+
+    def get(self, pk):
+        """Return the endpoint with the given pk, or None if it does not exist."""
+        if pk not in self.loaded:
+            self.pending.add(pk)
+            pks, self.pending = self.pending, set()
+            found = get_endpoints(pks)
+            for key in pks:
+                self.loaded[key] = found.get(key)
+        return self.loaded[pk]
+
+    def clear(self, **kwargs):
+        self.pending = set()
+        self.loaded = {}
+
+
+endpoint_loader = EndpointLoader()
+request_started.connect(endpoint_loader.clear, dispatch_uid="netbox_custom_widget_loader_start")
+request_finished.connect(endpoint_loader.clear, dispatch_uid="netbox_custom_widget_loader_finish")
+
+
+def _parse_endpoint_pk(endpoint_id):
+    try:
+        return int(endpoint_id)
+    except (TypeError, ValueError):
+        return None
+
+
 @register_widget
 class CustomAPIWidget(DashboardWidget):
     """Dashboard widget that displays data from API endpoints or bookmarks."""
@@ -29,17 +79,35 @@ class CustomAPIWidget(DashboardWidget):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Auto-set title based on selected endpoint
-        if self.title == self.default_title:
+        # Queue the endpoint so all widgets on a dashboard load in one query
+        endpoint_id = self.config.get("endpoint_id")
+        if endpoint_id and endpoint_id != BOOKMARKS_ENDPOINT_ID:
+            pk = _parse_endpoint_pk(endpoint_id)
+            if pk is not None:
+                endpoint_loader.register(pk)
+
+    @property
+    def title(self):
+        # Auto-set title based on selected endpoint, resolved on first access
+        if self._title == self.default_title:
             endpoint_id = self.config.get("endpoint_id")
             if endpoint_id == BOOKMARKS_ENDPOINT_ID:
-                self.title = "Bookmarks"
+                self._title = "Bookmarks"
             elif endpoint_id:
-                try:
-                    endpoint = CustomAPIEndpoint.objects.get(pk=endpoint_id)
-                    self.title = endpoint.name
-                except (CustomAPIEndpoint.DoesNotExist, ValueError):
-                    pass
+                endpoint = self._get_endpoint()
+                if endpoint is not None:
+                    self._title = endpoint.name
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        self._title = value
+
+    def _get_endpoint(self):
+        pk = _parse_endpoint_pk(self.config.get("endpoint_id"))
+        if pk is None:
+            return None
+        return endpoint_loader.get(pk)
 
     class ConfigForm(WidgetConfigForm):
         endpoint_id = forms.CharField(
@@ -81,9 +149,8 @@ class CustomAPIWidget(DashboardWidget):
             return self._render_bookmarks()
 
         # Handle API endpoints — defer data fetching to HTMX for fast page loads
-        try:
-            endpoint = CustomAPIEndpoint.objects.get(pk=int(endpoint_id))
-        except (CustomAPIEndpoint.DoesNotExist, ValueError):
+        endpoint = self._get_endpoint()
+        if endpoint is None:
             return render_to_string(
                 self.template_name,
                 {"error": f"Endpoint ID {endpoint_id} not found."},
@@ -91,7 +158,7 @@ class CustomAPIWidget(DashboardWidget):
 
         return render_to_string(
             self.template_name,
-            {"endpoint": endpoint, "deferred": True},
+            {"endpoint": endpoint, "deferred": True, "batch_refresh": get_plugin_setting("batch_refresh", True)},
         )
 
     def _render_bookmarks(self):